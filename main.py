@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
-from src.handlers import ExcelHandler
+from typing import Optional
+from src.handlers import ExcelHandler, BackgroundSaver, write_entries_fast
 from src.models import AccountingEntry
-from openpyxl import Workbook
+from src.services import LedgerAnalytics, OperationHistory, TaxLedger
+from src.utils import MemoryBudget, MemoryBudgetExceeded
 import os
 
 
@@ -17,16 +19,7 @@ def initialize_excel_file(file_path: str) -> bool:
 
         # 如果檔案不存在或是空檔案，建立新檔案
         if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-            workbook = Workbook()
-            worksheet = workbook.active
-            headers = [
-                '年份', '月份', '日期', '時間',
-                '平台', '商品名稱', '訂單數量',
-                '銷售總額', '平台費用', '實收金額',
-                '需要發票', '應稅'
-            ]
-            worksheet.append(headers)
-            workbook.save(file_path)
+            write_entries_fast(file_path, [])
             print(f"已建立新的記帳檔案：{file_path}")
         return True
     except Exception as e:
@@ -50,7 +43,9 @@ def main():
         print("Excel檔案檢查完成")
 
     # 初始化 Excel 處理器
-    handler = ExcelHandler(file_path)
+    handler = ExcelHandler(file_path, memory_budget=MemoryBudget())
+    # 背景儲存器：合併連續的變更，選單不必等待寫檔
+    saver = BackgroundSaver(handler)
     
     try:
         # 載入工作簿
@@ -58,29 +53,53 @@ def main():
             print("錯誤：無法載入工作簿")
             return
 
+        saver.start()
+        # 營業稅期別累計，隨帳本變更即時更新
+        tax_ledger = TaxLedger().attach(handler)
+        # 操作紀錄，只保存每次變更的前後差異
+        history = OperationHistory().attach(handler)
+
         while True:
+            # 背景儲存失敗時在選單前提示，避免使用者以為變更已寫入
+            error = saver.pop_error()
+            if error:
+                print(f"\n警告：自動儲存失敗，變更尚未寫入檔案 - {error}")
             print("\n=== 記帳自動化系統 ===")
             print("1. 新增記帳項目")
             print("2. 檢視所有記帳")
             print("3. 修改記帳項目")
             print("4. 刪除記帳項目")
+            print("5. 統計分析")
+            print("6. 營業稅申報彙總")
+            print("7. 復原上一步")
+            print("8. 重做")
             print("0. 離開系統")
             
             try:
-                choice = input("\n請選擇操作 (0-4): ").strip()
+                choice = input("\n請選擇操作 (0-8): ").strip()
             except EOFError:
                 break
                 
             if choice == "0":
                 break
+            elif choice in ("1", "3", "4", "7", "8") and handler.read_only:
+                print("錯誤：檔案過大，目前以唯讀模式開啟，只能檢視、統計與申報彙總")
             elif choice == "1":
-                add_entry(handler)
+                add_entry(handler, saver)
             elif choice == "2":
                 view_entries(handler)
             elif choice == "3":
-                update_entry(handler)
+                update_entry(handler, saver)
             elif choice == "4":
-                delete_entry(handler)
+                delete_entry(handler, saver)
+            elif choice == "5":
+                report_entries(handler)
+            elif choice == "6":
+                tax_report(tax_ledger, os.path.dirname(file_path))
+            elif choice == "7":
+                undo_change(handler, history, saver)
+            elif choice == "8":
+                redo_change(handler, history, saver)
             else:
                 print("無效的選擇，請重試")
 
@@ -89,12 +108,28 @@ def main():
     except Exception as e:
         print(f"發生錯誤：{e}")
     finally:
-        # 確保變更被保存
+        # 確保變更被保存（沒有變更時不會寫檔）
+        saver.stop()
         handler.save_workbook()
+        stats = saver.stats()
+        if stats['saves']:
+            print(f"\n共儲存 {stats['saves']} 次（合併 {stats['coalesced']} 次變更），"
+                  f"平均耗時 {stats['avg_latency']:.3f} 秒")
         print("\n系統已關閉")
 
 
-def add_entry(handler: ExcelHandler):
+def commit_changes(handler: ExcelHandler, saver: Optional[BackgroundSaver] = None) -> bool:
+    """
+    儲存變更；有背景儲存器時交由背景執行緒合併寫入
+    背景儲存目前處於失敗狀態時返回 False
+    """
+    if saver:
+        saver.request_save()
+        return not saver.has_failed
+    return handler.save_workbook()
+
+
+def add_entry(handler: ExcelHandler, saver: Optional[BackgroundSaver] = None):
     """新增記帳項目"""
     try:
         print("\n=== 新增記帳項目 ===")
@@ -143,7 +178,7 @@ def add_entry(handler: ExcelHandler):
 
             if entry.validate():
                 if handler.add_entry(entry):
-                    if handler.save_workbook():
+                    if commit_changes(handler, saver):
                         print("記帳項目新增成功！")
                     else:
                         print("錯誤：無法儲存變更")
@@ -166,30 +201,36 @@ def add_entry(handler: ExcelHandler):
 def view_entries(handler: ExcelHandler):
     """檢視所有記帳項目"""
     print("\n=== 所有記帳項目 ===")
-    entries = handler.read_entries()
-    
-    if not entries:
-        print("目前沒有任何記帳項目")
+    count = 0
+
+    try:
+        # 分塊讀取，大型帳本不必一次載入所有項目
+        for chunk in handler.iter_entries():
+            for entry in chunk:
+                count += 1
+                print(f"\n--- 項目 {count} ---")
+                print(f"年份：{entry.year}")
+                print(f"月份：{entry.month}")
+                print(f"日期：{entry.day}")
+                print(f"時間：{entry.time}")
+                print(f"平台：{entry.platform}")
+                print(f"商品：{entry.product_name}")
+                print(f"數量：{entry.order_quantity}")
+                print(f"銷售額：{entry.total_sales}")
+                print(f"手續費：{entry.platform_fee}")
+                print(f"實收金額：{entry.actual_income}")
+                print(f"需要發票：{'是' if entry.invoice_required else '否'}")
+                print(f"課稅：{'是' if entry.taxable else '否'}")
+                print("-" * 30)
+    except MemoryBudgetExceeded as e:
+        print(f"錯誤：{e}")
         return
 
-    for i, entry in enumerate(entries, 1):
-        print(f"\n--- 項目 {i} ---")
-        print(f"年份：{entry.year}")
-        print(f"月份：{entry.month}")
-        print(f"日期：{entry.day}")
-        print(f"時間：{entry.time}")
-        print(f"平台：{entry.platform}")
-        print(f"商品：{entry.product_name}")
-        print(f"數量：{entry.order_quantity}")
-        print(f"銷售額：{entry.total_sales}")
-        print(f"手續費：{entry.platform_fee}")
-        print(f"實收金額：{entry.actual_income}")
-        print(f"需要發票：{'是' if entry.invoice_required else '否'}")
-        print(f"課稅：{'是' if entry.taxable else '否'}")
-        print("-" * 30)
+    if not count:
+        print("目前沒有任何記帳項目")
 
 
-def update_entry(handler: ExcelHandler):
+def update_entry(handler: ExcelHandler, saver: Optional[BackgroundSaver] = None):
     """修改記帳項目"""
     view_entries(handler)
     
@@ -254,7 +295,7 @@ def update_entry(handler: ExcelHandler):
 
             if updated_entry.validate():
                 if handler.update_entry(row_index, updated_entry):
-                    if handler.save_workbook():
+                    if commit_changes(handler, saver):
                         print("記帳項目更新成功！")
                     else:
                         print("錯誤：無法儲存變更")
@@ -278,7 +319,7 @@ def update_entry(handler: ExcelHandler):
         print(f"錯誤：{e}")
 
 
-def delete_entry(handler: ExcelHandler):
+def delete_entry(handler: ExcelHandler, saver: Optional[BackgroundSaver] = None):
     """刪除記帳項目"""
     view_entries(handler)
     
@@ -288,7 +329,7 @@ def delete_entry(handler: ExcelHandler):
         confirm = input("確定要刪除這個項目嗎？(y/n): ").strip()
         if confirm.lower() == 'y':
             if handler.delete_entry(row_index):
-                if handler.save_workbook():
+                if commit_changes(handler, saver):
                     print("記帳項目刪除成功！")
                 else:
                     print("錯誤：無法儲存變更")
@@ -305,5 +346,134 @@ def delete_entry(handler: ExcelHandler):
         print(f"錯誤：{e}")
 
 
+def undo_change(handler: ExcelHandler, history: OperationHistory,
+                saver: Optional[BackgroundSaver] = None):
+    """復原上一次的新增、修改或刪除"""
+    if not history.can_undo:
+        print("沒有可以復原的操作")
+        return
+
+    delta = history.undo()
+    if not delta:
+        print("錯誤：無法復原操作")
+    elif commit_changes(handler, saver):
+        print(f"已復原：{delta.description}")
+    else:
+        print("錯誤：無法儲存變更")
+
+
+def redo_change(handler: ExcelHandler, history: OperationHistory,
+                saver: Optional[BackgroundSaver] = None):
+    """重做上一次復原的操作"""
+    if not history.can_redo:
+        print("沒有可以重做的操作")
+        return
+
+    delta = history.redo()
+    if not delta:
+        print("錯誤：無法重做操作")
+    elif commit_changes(handler, saver):
+        print(f"已重做：{delta.description}")
+    else:
+        print("錯誤：無法儲存變更")
+
+
+def report_entries(handler: ExcelHandler):
+    """統計商品實收金額排名與各平台訂單金額分位數"""
+    print("\n=== 統計分析 ===")
+
+    try:
+        year = input("年份（直接按 Enter 統計全部）: ").strip() or None
+        quarter_str = input("季度 1-4（直接按 Enter 統計全年）: ").strip()
+        quarter = int(quarter_str) if quarter_str else None
+        if quarter is not None and not 1 <= quarter <= 4:
+            print("錯誤：季度必須介於 1 到 4")
+            return
+        top_str = input("顯示前幾名商品 (10): ").strip()
+        top = int(top_str) if top_str else 10
+
+        analytics = LedgerAnalytics(year=year, quarter=quarter, top_orders=top)
+        for chunk in handler.iter_entries():
+            analytics.consume(chunk)
+
+        if not analytics.entries:
+            print("沒有符合條件的記帳項目")
+            if analytics.skipped:
+                print(f"（{analytics.skipped} 筆月份格式不正確，未列入季度統計）")
+            return
+
+        summary = analytics.summary()
+        print(f"\n共 {summary['entries']} 筆，實收金額合計：{summary['total_income']:.2f}")
+        if summary['skipped']:
+            print(f"（{summary['skipped']} 筆月份格式不正確，未列入季度統計）")
+
+        print(f"\n--- 實收金額前 {top} 名商品 ---")
+        for rank, (product, income) in enumerate(analytics.top_products(top), 1):
+            print(f"{rank}. {product}：{income:.2f}")
+
+        print(f"\n--- 實收金額前 {top} 筆訂單 ---")
+        for rank, (entry, income) in enumerate(analytics.top_orders.items(), 1):
+            print(f"{rank}. {entry.year}/{entry.month}/{entry.day} {entry.time} "
+                  f"{entry.platform} {entry.product_name}：{income:.2f}")
+
+        print("\n--- 各平台訂單金額（近似值）---")
+        for platform in summary['platforms']:
+            median = analytics.platform_quantile(platform, 0.5)
+            p90 = analytics.platform_quantile(platform, 0.9)
+            print(f"{platform}：中位數 {median:.2f}，第 90 百分位 {p90:.2f}")
+
+    except ValueError as e:
+        print(f"錯誤：輸入格式不正確 - {e}")
+    except KeyboardInterrupt:
+        print("\n取消統計操作")
+    except MemoryBudgetExceeded as e:
+        print(f"錯誤：{e}")
+
+
+def tax_report(tax_ledger: TaxLedger, output_dir: str):
+    """顯示營業稅申報期別的彙總金額，並可輸出申報工作表"""
+    print("\n=== 營業稅申報彙總 ===")
+
+    periods = tax_ledger.periods()
+    if tax_ledger.skipped:
+        print(f"（{tax_ledger.skipped} 筆月份格式不正確，未列入任何申報期別）")
+    if not periods:
+        print("目前沒有任何記帳項目")
+        return
+
+    for totals in periods:
+        print(f"{totals.label}：應稅 {totals.taxable_sales:.2f}，"
+              f"需開發票 {totals.invoice_sales:.2f}，共 {totals.entries} 筆")
+
+    try:
+        year = input("\n請輸入申報年份 (YYYY): ").strip()
+        period = int(input("請輸入申報期別 (1-6，每兩個月一期): ").strip())
+        if not 1 <= period <= 6:
+            print("錯誤：期別必須介於 1 到 6")
+            return
+
+        totals = tax_ledger.period(year, period)
+        print(f"\n--- {totals.label} ---")
+        print(f"應稅銷售額：{totals.taxable_sales:.2f}（{totals.taxable_entries} 筆）")
+        print(f"應稅銷售手續費：{totals.taxable_fees:.2f}")
+        print(f"免稅銷售額：{totals.exempt_sales:.2f}")
+        print(f"需開發票銷售額：{totals.invoice_sales:.2f}（{totals.invoice_entries} 筆）")
+        print(f"需開發票銷售手續費：{totals.invoice_fees:.2f}")
+        print(f"應稅銷售額（未稅）：{totals.taxable_net_sales:.0f}")
+        print(f"銷項稅額：{totals.output_tax:.0f}")
+
+        if input("\n是否輸出申報工作表？(y/n): ").strip().lower() == 'y':
+            output_path = os.path.join(output_dir, f"營業稅申報_{year}_{period * 2 - 1:02d}-{period * 2:02d}.xlsx")
+            if tax_ledger.export_filing_workbook(output_path, [(year, period)]):
+                print(f"已輸出申報工作表：{output_path}")
+            else:
+                print("錯誤：無法輸出申報工作表")
+
+    except ValueError as e:
+        print(f"錯誤：輸入格式不正確 - {e}")
+    except KeyboardInterrupt:
+        print("\n取消申報彙總操作")
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,3 +1,15 @@
 from .excel_handler import ExcelHandler
+from .background_saver import BackgroundSaver
+from .fast_writer import write_entries_fast, compact_ledger
+from .ledger_exporter import LedgerExporter, read_columnar
+from .ledger_schema import LedgerSchema
 
-__all__ = ['ExcelHandler']
\ No newline at end of file
+__all__ = [
+    'ExcelHandler',
+    'BackgroundSaver',
+    'write_entries_fast',
+    'compact_ledger',
+    'LedgerExporter',
+    'read_columnar',
+    'LedgerSchema'
+]
\ No newline at end of file
@@ -0,0 +1,166 @@
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from .excel_handler import ExcelHandler
+
+
+class BackgroundSaver:
+    """在背景執行緒中合併連續的儲存要求，於短暫靜止期後或結束時一次寫入"""
+
+    def __init__(self, handler: ExcelHandler, quiet_period: float = 0.5,
+                 max_latency_samples: int = 100, max_retries: int = 5,
+                 max_backoff: float = 30.0):
+        """
+        初始化背景儲存器
+        Args:
+            handler: 要儲存的 Excel 處理器
+            quiet_period: 最後一次變更後需等待的秒數，期間內的變更會合併成一次儲存
+            max_latency_samples: 保留的儲存耗時樣本數量
+            max_retries: 連續失敗後自動重試的次數，用完後等到下一次要求儲存才再試
+            max_backoff: 重試間隔的上限（秒），間隔每次失敗加倍
+        """
+        self.handler = handler
+        self.quiet_period = quiet_period
+        self.max_latency_samples = max_latency_samples
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._last_request = 0.0
+        self._retry_at = 0.0
+        self._gave_up = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._error_reported = True
+
+        # 統計資料
+        self.requests = 0
+        self.saves = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.latencies: List[float] = []
+
+    def start(self) -> None:
+        """啟動背景儲存執行緒"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name='BackgroundSaver', daemon=True
+        )
+        self._thread.start()
+
+    def request_save(self) -> None:
+        """要求儲存，立即返回；實際寫入由背景執行緒完成"""
+        with self._condition:
+            self.requests += 1
+            self._pending += 1
+            self._last_request = time.monotonic()
+            self._gave_up = False
+            self._condition.notify()
+
+    @property
+    def has_failed(self) -> bool:
+        """最近一次儲存是否失敗（尚有變更未寫入檔案）"""
+        return self.consecutive_failures > 0
+
+    def pop_error(self) -> Optional[str]:
+        """取得尚未回報的儲存錯誤，每個錯誤只返回一次"""
+        with self._condition:
+            if self._error_reported or not self.has_failed:
+                return None
+            self._error_reported = True
+            return self.last_error
+
+    def flush(self) -> bool:
+        """立即在目前執行緒寫入所有待儲存的變更"""
+        with self._condition:
+            pending = self._pending
+            self._pending = 0
+        return self._save(pending)
+
+    def stop(self) -> bool:
+        """停止背景執行緒，並確保所有變更都已寫入"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        return self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """取得儲存統計資料"""
+        latencies = list(self.latencies)
+        return {
+            'requests': self.requests,
+            'saves': self.saves,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            'last_latency': latencies[-1] if latencies else 0.0,
+            'avg_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+            'max_latency': max(latencies) if latencies else 0.0
+        }
+
+    def _run(self) -> None:
+        """背景執行緒主迴圈"""
+        while True:
+            with self._condition:
+                while (not self._pending or self._gave_up) and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+
+                # 等待靜止期（及失敗後的重試間隔）結束，期間的新要求會延後儲存時間
+                while not self._stopping:
+                    due = max(self._last_request + self.quiet_period, self._retry_at)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopping:
+                    return
+
+                pending = self._pending
+                self._pending = 0
+
+            self._save(pending)
+
+    def _save(self, pending: int) -> bool:
+        """執行一次儲存並更新統計"""
+        if not pending and not self.handler.is_dirty:
+            return True
+
+        start = time.perf_counter()
+        # 錯誤由 pop_error() 交給選單顯示，不在背景執行緒輸出
+        success = self.handler.save_workbook(quiet=True)
+        elapsed = time.perf_counter() - start
+
+        with self._condition:
+            if success:
+                self.saves += 1
+                if pending > 1:
+                    self.coalesced += pending - 1
+                self.latencies.append(elapsed)
+                if len(self.latencies) > self.max_latency_samples:
+                    del self.latencies[0]
+                self.consecutive_failures = 0
+                self._retry_at = 0.0
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.last_error = self.handler.last_save_error
+                self._error_reported = False
+                # 保留要求，以指數退避重試；超過次數後等下一次要求儲存
+                self._pending += pending
+                backoff = self.quiet_period * 2 ** self.consecutive_failures
+                self._retry_at = time.monotonic() + min(backoff, self.max_backoff)
+                if self.consecutive_failures > self.max_retries:
+                    self._gave_up = True
+        return success
@@ -1,36 +1,202 @@
-from typing import List, Optional
+import copy
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 from openpyxl import Workbook, load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
 from ..models import AccountingEntry
+from ..utils.memory_budget import MemoryBudget, MemoryGuard, guarded
+from .ledger_schema import HEADERS, LedgerSchema
+
+
+DEFAULT_SCHEMA = LedgerSchema.default()
+
+# 變更通知：(種類, 列索引, 變更前, 變更後)，種類為 add、insert、update、delete 或 reload
+ChangeListener = Callable[[str, int, Optional[AccountingEntry], Optional[AccountingEntry]], None]
+
+
+def replace_file(temp_path: str, target_path: str) -> None:
+    """以暫存檔原子取代目標檔案，並保留原檔案的權限（新檔案則依 umask）"""
+    if os.path.exists(target_path):
+        mode = os.stat(target_path).st_mode & 0o777
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(temp_path, mode)
+    os.replace(temp_path, target_path)
+
+
+def iter_sheet_rows(file_path: str, min_row: int = 2) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    """
+    以唯讀模式逐列讀取工作表，不會將整個檔案載入記憶體
+    Args:
+        file_path: Excel 檔案路徑
+        min_row: 起始列（預設跳過標題列）
+    Yields:
+        (列索引, 該列的值)
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.active
+        for row_index, row in enumerate(
+                worksheet.iter_rows(min_row=min_row, values_only=True), start=min_row):
+            yield row_index, row
+    finally:
+        workbook.close()
+
+
+def read_header_row(file_path: str) -> Tuple[Any, ...]:
+    """以唯讀模式讀取標題列，空白工作表返回空元組"""
+    for _, row in iter_sheet_rows(file_path, min_row=1):
+        return row
+    return ()
+
+
+def load_sheet_schema(file_path: str) -> LedgerSchema:
+    """
+    以唯讀模式讀取標題列並建立欄位對應
+    Raises:
+        ValueError: 標題列缺少必要欄位
+    """
+    header_row = read_header_row(file_path)
+    schema = LedgerSchema.from_header_row(header_row)
+    if schema is None:
+        missing = '、'.join(LedgerSchema.missing_headers(header_row))
+        raise ValueError(f"工作表標題列缺少必要欄位：{missing}（{file_path}）")
+    return schema
+
+
+def iter_ledger_entries(file_path: str) -> Iterator[Tuple[int, AccountingEntry]]:
+    """
+    以唯讀模式逐筆讀取有效的記帳項目，略過空行與無法轉換的列
+    Yields:
+        (列索引, 記帳項目)
+    """
+    schema = load_sheet_schema(file_path)
+    for row_index, row in iter_sheet_rows(file_path):
+        if not any(row):
+            continue
+        try:
+            entry = schema.decode(row)
+        except Exception:
+            continue
+        if entry.validate():
+            yield row_index, entry
+
+
+def iter_ledger_fields(file_path: str, fields: Sequence[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    以唯讀模式逐列讀取指定欄位，只轉換需要的欄位
+    Args:
+        fields: 欄位名稱或標題，例如 ['平台', '實收金額']
+    Yields:
+        (列索引, {欄位名稱: 值})
+    """
+    schema = load_sheet_schema(file_path)
+    decoders = schema.compile(fields)
+    for row_index, row in iter_sheet_rows(file_path):
+        if not any(row):
+            continue
+        try:
+            yield row_index, schema.decode_fields(row, decoders)
+        except Exception:
+            continue
 
 
 class ExcelHandler:
     """負責處理 Excel 檔案的讀寫操作"""
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, cache_size: int = 128,
+                 memory_budget: Optional[MemoryBudget] = None):
         """
         初始化 Excel 處理器
         Args:
             file_path: Excel 檔案路徑
+            cache_size: 已解析記帳項目的快取筆數，0 表示不快取
+            memory_budget: 記憶體預算，大檔案會改用分塊處理並監控記憶體用量
         """
         self.file_path = file_path
+        self.memory_budget = memory_budget
         self.workbook: Optional[Workbook] = None
         self.worksheet: Optional[Worksheet] = None
-        self.headers = [
-            '年份', '月份', '日期', '時間',
-            '平台', '商品名稱', '訂單數量',
-            '銷售總額', '平台費用', '實收金額',
-            '需要發票', '應稅'
-        ]
+        self.headers = list(HEADERS)
+        # 依標題列建立的欄位對應，載入時更新
+        self.schema = DEFAULT_SCHEMA
+        # 檔案超過記憶體預算、無法完整載入時只提供唯讀瀏覽
+        self.read_only = False
+        # 是否有尚未儲存的變更
+        self._dirty = False
+        # 保護工作簿，避免背景儲存與編輯同時進行
+        self.lock = threading.RLock()
+        # 儲存統計
+        self.save_count = 0
+        self.last_save_seconds = 0.0
+        self.total_save_seconds = 0.0
+        # 最近一次儲存失敗的原因，成功儲存後清除
+        self.last_save_error: Optional[str] = None
+        # 以列索引為鍵的 LRU 快取
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[int, AccountingEntry]' = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 變更通知的接收者
+        self._listeners: List[ChangeListener] = []
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """註冊變更通知，新增、插入、更新、刪除及重新載入時呼叫"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener) -> None:
+        """取消變更通知"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, kind: str, row_index: int,
+                before: Optional[AccountingEntry], after: Optional[AccountingEntry]) -> None:
+        """通知所有接收者；變更已完成，個別接收者的錯誤不影響結果或其他接收者"""
+        for listener in list(self._listeners):
+            try:
+                listener(kind, row_index, before, after)
+            except Exception as e:
+                print(f"處理變更通知時發生錯誤: {e}")
+
+    @property
+    def is_dirty(self) -> bool:
+        """是否有尚未儲存的變更"""
+        return self._dirty
+
+    def mark_dirty(self) -> None:
+        """標記工作簿已變更"""
+        self._dirty = True
 
     def load_workbook(self) -> bool:
         """載入 Excel 檔案"""
         try:
-            self.workbook = load_workbook(self.file_path)
-            self.worksheet = self.workbook.active
-            return self._validate_workbook()
+            budget = self.memory_budget
+            if budget and budget.estimate_load_bytes(self.file_path) > budget.limit_bytes:
+                return self._open_read_only()
+
+            with self.lock:
+                self.workbook = load_workbook(self.file_path)
+                self.worksheet = self.workbook.active
+                self.read_only = False
+                self._dirty = False
+                self._cache.clear()
+                valid = self._validate_workbook()
+                if not valid:
+                    # 格式不正確時不保留工作簿，避免任何儲存覆寫原檔案
+                    self.workbook = None
+                    self.worksheet = None
+            self._notify('reload', 0, None, None)
+            return valid
         except FileNotFoundError:
             print(f"找不到檔案：{self.file_path}")
             return False
@@ -38,17 +204,74 @@ class ExcelHandler:
             print(f"載入工作簿時發生錯誤: {e}")
             return False
 
-    def save_workbook(self) -> bool:
-        """儲存 Excel 檔案"""
+    def _open_read_only(self) -> bool:
+        """不載入工作簿，改以唯讀串流提供瀏覽、統計、驗證與匯出"""
+        schema = load_sheet_schema(self.file_path)
+        with self.lock:
+            self.workbook = None
+            self.worksheet = None
+            self.schema = schema
+            self.read_only = True
+            self._dirty = False
+            self._cache.clear()
+        budget = self.memory_budget
+        print(f"檔案過大：完整載入 {self.file_path} 預估需要 "
+              f"{budget.estimate_load_bytes(self.file_path) / (1024 * 1024):.0f} MB 記憶體，"
+              f"超過預算 {budget.limit_bytes / (1024 * 1024):.0f} MB，改以唯讀模式開啟")
+        self._notify('reload', 0, None, None)
+        return True
+
+    def _writable(self) -> bool:
+        """是否可以修改工作表"""
+        if self.read_only:
+            print("檔案過大，目前以唯讀模式開啟，無法修改記帳項目")
+            return False
+        return self.worksheet is not None
+
+    def save_workbook(self, force: bool = False, quiet: bool = False) -> bool:
+        """
+        儲存 Excel 檔案
+        沒有變更時直接略過；寫入暫存檔後再以原子方式取代原檔案
+        Args:
+            force: 即使沒有變更也強制儲存
+            quiet: 失敗時不輸出訊息，只記錄在 last_save_error
+        """
         try:
-            if self.workbook:
-                self.workbook.save(self.file_path)
+            with self.lock:
+                if not self.workbook:
+                    return False
+                if not self._dirty and not force:
+                    return True
+
+                start = time.perf_counter()
+                self._atomic_save()
+                elapsed = time.perf_counter() - start
+
+                self._dirty = False
+                self.save_count += 1
+                self.last_save_seconds = elapsed
+                self.total_save_seconds += elapsed
+                self.last_save_error = None
                 return True
-            return False
         except Exception as e:
-            print(f"儲存工作簿時發生錯誤: {e}")
+            self.last_save_error = str(e)
+            if not quiet:
+                print(f"儲存工作簿時發生錯誤: {e}")
             return False
 
+    def _atomic_save(self) -> None:
+        """先寫入同目錄的暫存檔，再取代目標檔案，避免中斷時留下損毀的檔案"""
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=directory)
+        os.close(fd)
+        try:
+            self.workbook.save(temp_path)
+            replace_file(temp_path, self.file_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
     def read_entries(self) -> List[AccountingEntry]:
         """讀取所有記帳項目"""
         entries = []
@@ -61,21 +284,7 @@ class ExcelHandler:
                 continue
             
             try:
-                entry_dict = {
-                    'year': str(row[0]),
-                    'month': str(row[1]),
-                    'day': str(row[2]),
-                    'time': str(row[3]),
-                    'platform': str(row[4]),
-                    'product_name': str(row[5]),
-                    'order_quantity': int(row[6]),
-                    'total_sales': float(row[7]),
-                    'platform_fee': float(row[8]),
-                    'actual_income': float(row[9]),
-                    'invoice_required': bool(row[10]),
-                    'taxable': bool(row[11])
-                }
-                entry = AccountingEntry.from_dict(entry_dict)
+                entry = self.schema.decode(row)
                 if entry.validate():
                     entries.append(entry)
             except Exception as e:
@@ -84,107 +293,305 @@ class ExcelHandler:
 
         return entries
 
+    def iter_entries(self, chunk_size: Optional[int] = None) -> Iterator[List[AccountingEntry]]:
+        """
+        分塊讀取記帳項目，不必一次建立完整清單
+        已載入工作簿時直接讀取記憶體中的工作表；尚未載入或唯讀模式時以唯讀串流讀取檔案，
+        大檔案的串流讀取會監控記憶體用量
+        Args:
+            chunk_size: 每塊的筆數，未指定時依記憶體預算設定
+        Yields:
+            記帳項目清單
+        """
+        if chunk_size is None:
+            chunk_size = self.memory_budget.chunk_size if self.memory_budget else 500
+
+        guard = None
+        if self.worksheet is not None:
+            source = (entry for _, entry in self.iter_indexed_entries())
+        elif os.path.exists(self.file_path):
+            source = (entry for _, entry in iter_ledger_entries(self.file_path))
+            guard = self._guard('list')
+        else:
+            return
+
+        with guard or nullcontext():
+            chunk: List[AccountingEntry] = []
+            for entry in guarded(source, guard):
+                chunk.append(entry)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def validate_file(self) -> Dict[str, int]:
+        """
+        以唯讀模式逐列驗證檔案中的記帳項目
+        Returns:
+            {'rows': 資料列數, 'valid': 有效筆數, 'invalid': 無效筆數}
+        """
+        stats = {'rows': 0, 'valid': 0, 'invalid': 0}
+        schema = load_sheet_schema(self.file_path)
+        guard = self._guard('validate')
+        with guard or nullcontext():
+            for _, row in guarded(iter_sheet_rows(self.file_path), guard):
+                if not any(row):
+                    continue
+                stats['rows'] += 1
+                try:
+                    valid = schema.decode(row).validate()
+                except Exception:
+                    valid = False
+                stats['valid' if valid else 'invalid'] += 1
+        return stats
+
+    def iter_indexed_entries(self) -> Iterator[Tuple[int, AccountingEntry]]:
+        """
+        逐筆讀取已載入工作表中的有效記帳項目（唯讀模式時直接讀取檔案）
+        Yields:
+            (列索引, 記帳項目)
+        """
+        if self.read_only and not self.worksheet:
+            yield from iter_ledger_entries(self.file_path)
+            return
+        if not self.worksheet:
+            return
+
+        for row_index, row in enumerate(
+                self.worksheet.iter_rows(min_row=2, values_only=True), start=2):
+            if not any(row):
+                continue
+            try:
+                entry = self.schema.decode(row)
+            except Exception as e:
+                print(f"讀取記帳項目時發生錯誤: {e}")
+                continue
+            if entry.validate():
+                yield row_index, entry
+
+    def _guard(self, operation: str) -> Optional[MemoryGuard]:
+        """檔案超過門檻時建立記憶體監控"""
+        if self.memory_budget and self.memory_budget.is_large(self.file_path):
+            return self.memory_budget.guard(operation)
+        return None
+
+    def read_fields(self, fields: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        只讀取指定欄位，略過其他欄位的型別轉換
+        Args:
+            fields: 欄位名稱或標題，例如 ['平台', '實收金額']
+        """
+        records = []
+        if not self.worksheet:
+            return records
+
+        decoders = self.schema.compile(fields)
+        for row in self.worksheet.iter_rows(min_row=2, values_only=True):
+            if not any(row):
+                continue
+            try:
+                records.append(self.schema.decode_fields(row, decoders))
+            except Exception as e:
+                print(f"讀取記帳項目時發生錯誤: {e}")
+                continue
+
+        return records
+
     def add_entry(self, entry: AccountingEntry) -> bool:
         """新增記帳項目"""
-        if not self.worksheet or not entry.validate():
+        if not self._writable() or not entry.validate():
             return False
 
         try:
-            row_values = [
-                entry.year, entry.month, entry.day, entry.time,
-                entry.platform, entry.product_name,
-                entry.order_quantity, entry.total_sales, entry.platform_fee,
-                entry.actual_income, entry.invoice_required, entry.taxable
-            ]
-            self.worksheet.append(row_values)
+            row_values = self.schema.encode(entry)
+            with self.lock:
+                self.worksheet.append(row_values)
+                row_index = self.worksheet.max_row
+                self._cache.pop(row_index, None)
+                self._dirty = True
+            self._notify('add', row_index, None, copy.copy(entry))
             return True
         except Exception as e:
             print(f"新增記帳項目時發生錯誤: {e}")
             return False
 
+    def insert_entry(self, row_index: int, entry: AccountingEntry) -> bool:
+        """在指定列插入記帳項目，原本的列與其後的列往下移"""
+        if not self._writable() or entry is None or not entry.validate() or row_index < 2:
+            return False
+
+        try:
+            with self.lock:
+                self.worksheet.insert_rows(row_index)
+                for name, value in entry.to_dict().items():
+                    self.worksheet.cell(row=row_index, column=self.schema.column(name), value=value)
+                self._shift_cache(row_index, 1)
+                self._dirty = True
+            self._notify('insert', row_index, None, copy.copy(entry))
+            return True
+        except Exception as e:
+            print(f"插入記帳項目時發生錯誤: {e}")
+            return False
+
     def update_entry(self, row_index: int, entry: AccountingEntry) -> bool:
         """更新指定的記帳項目"""
-        if not self.worksheet or not entry.validate():
+        if not self._writable() or not entry.validate():
             return False
 
         try:
-            # Excel 的列索引從 1 開始
-            row_values = [
-                entry.year, entry.month, entry.day, entry.time,
-                entry.platform, entry.product_name,
-                entry.order_quantity, entry.total_sales, entry.platform_fee,
-                entry.actual_income, entry.invoice_required, entry.taxable
-            ]
-            for col, value in enumerate(row_values, start=1):
-                self.worksheet.cell(row=row_index, column=col, value=value)
+            # Excel 的列索引從 1 開始，只寫入對應的欄位，保留額外欄位
+            with self.lock:
+                before = self._current_entry(row_index) if self._listeners else None
+                for name, value in entry.to_dict().items():
+                    self.worksheet.cell(row=row_index, column=self.schema.column(name), value=value)
+                self._cache.pop(row_index, None)
+                self._dirty = True
+            self._notify('update', row_index, before, copy.copy(entry))
             return True
         except Exception as e:
             print(f"更新記帳項目時發生錯誤: {e}")
             return False
 
     def delete_entry(self, row_index: int) -> bool:
-        """刪除指定的記帳項目"""
-        if not self.worksheet:
+        """刪除指定的記帳項目，列索引超出範圍時返回 False"""
+        if not self._writable():
             return False
 
         try:
-            self.worksheet.delete_rows(row_index)
+            with self.lock:
+                if row_index < 2 or row_index > self.worksheet.max_row:
+                    return False
+                before = self._current_entry(row_index) if self._listeners else None
+                self.worksheet.delete_rows(row_index)
+                self._shift_cache(row_index)
+                self._dirty = True
+            self._notify('delete', row_index, before, None)
             return True
         except Exception as e:
             print(f"刪除記帳項目時發生錯誤: {e}")
             return False
 
     def get_entry_by_index(self, row_index: int) -> Optional[AccountingEntry]:
-        """取得指定索引的記帳項目"""
+        """取得指定索引的記帳項目（優先使用快取）"""
         if not self.worksheet:
             return None
 
+        with self.lock:
+            # 超出範圍時直接返回，避免 iter_rows 在工作表中建立空白列
+            if row_index < 2 or row_index > self.worksheet.max_row:
+                return None
+
+            cached = self._cache.get(row_index)
+            if cached is not None:
+                self._cache.move_to_end(row_index)
+                self.cache_hits += 1
+                return copy.copy(cached)
+            self.cache_misses += 1
+
+            try:
+                entry = self._decode_row(row_index)
+                return copy.copy(entry) if entry else None
+            except Exception as e:
+                print(f"取得記帳項目時發生錯誤: {e}")
+                return None
+
+    def _decode_row(self, row_index: int) -> Optional[AccountingEntry]:
+        """解析指定列並放入快取，無效時返回 None"""
+        row = tuple(self.worksheet.iter_rows(
+            min_row=row_index,
+            max_row=row_index,
+            values_only=True
+        ))[0]
+
+        entry = self.schema.decode(row)
+        if not entry.validate():
+            return None
+        self._cache_put(row_index, entry)
+        return entry
+
+    def _current_entry(self, row_index: int) -> Optional[AccountingEntry]:
+        """取得變更前的記帳項目，不計入快取統計"""
+        if row_index < 2 or row_index > self.worksheet.max_row:
+            return None
+        cached = self._cache.get(row_index)
+        if cached is not None:
+            return copy.copy(cached)
         try:
-            row = tuple(self.worksheet.iter_rows(
-                min_row=row_index,
-                max_row=row_index,
-                values_only=True
-            ))[0]
-
-            entry_dict = {
-                'year': str(row[0]),
-                'month': str(row[1]),
-                'day': str(row[2]),
-                'time': str(row[3]),
-                'platform': str(row[4]),
-                'product_name': str(row[5]),
-                'order_quantity': int(row[6]),
-                'total_sales': float(row[7]),
-                'platform_fee': float(row[8]),
-                'actual_income': float(row[9]),
-                'invoice_required': bool(row[10]),
-                'taxable': bool(row[11])
-            }
-            entry = AccountingEntry.from_dict(entry_dict)
-            return entry if entry.validate() else None
-        except Exception as e:
-            print(f"取得記帳項目時發生錯誤: {e}")
+            entry = self._decode_row(row_index)
+        except Exception:
             return None
+        return copy.copy(entry) if entry else None
+
+    def cache_info(self) -> Dict[str, int]:
+        """取得快取統計資料"""
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._cache),
+            'max_size': self.cache_size
+        }
+
+    def clear_cache(self) -> None:
+        """清除快取"""
+        with self.lock:
+            self._cache.clear()
+
+    def _cache_put(self, row_index: int, entry: AccountingEntry) -> None:
+        """加入快取，超過上限時移除最久未使用的項目"""
+        if self.cache_size <= 0:
+            return
+        self._cache[row_index] = entry
+        self._cache.move_to_end(row_index)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _shift_cache(self, row_index: int, amount: int = -1) -> None:
+        """
+        列數變動後調整快取的鍵
+        Args:
+            row_index: 變動的起始列；amount 為負時此列已被刪除
+            amount: 後續列的位移量
+        """
+        shifted: 'OrderedDict[int, AccountingEntry]' = OrderedDict()
+        for index, entry in self._cache.items():
+            if index < row_index:
+                shifted[index] = entry
+            elif amount < 0 and index < row_index - amount:
+                continue
+            else:
+                shifted[index + amount] = entry
+        self._cache = shifted
 
     def _validate_workbook(self) -> bool:
-        """驗證工作簿格式是否正確"""
+        """
+        驗證工作簿格式是否正確
+        空白工作表會加入標題列；標題列缺少必要欄位時拒絕載入，不會刪除任何資料
+        """
         if not self.worksheet:
             return False
 
         try:
+            self.schema = DEFAULT_SCHEMA
+
             # 檢查是否為空白工作表
-            if self.worksheet.max_row < 1:
-                # 如果是空白的，加入標題列
-                self.worksheet.append(self.headers)
+            if not any(any(value is not None for value in row)
+                       for row in self.worksheet.iter_rows(values_only=True)):
+                # 如果是空白的，在第一列寫入標題
+                for column, header in enumerate(self.headers, start=1):
+                    self.worksheet.cell(row=1, column=column, value=header)
+                self._dirty = True
                 return True
 
-            # 檢查標題列
+            # 檢查標題列，依標題名稱對應欄位（允許重新排序與額外欄位）
             headers = [cell.value for cell in next(self.worksheet.iter_rows(max_row=1))]
-            if not all(header == expected for header, expected in zip(headers, self.headers)):
-                # 如果標題不符合預期，清空工作表並加入正確的標題
-                self.worksheet.delete_rows(1, self.worksheet.max_row)
-                self.worksheet.append(self.headers)
+            schema = LedgerSchema.from_header_row(headers)
+            if schema is None:
+                missing = '、'.join(LedgerSchema.missing_headers(headers))
+                print(f"工作表標題列缺少必要欄位：{missing}，請修正標題後再載入")
+                return False
+            self.schema = schema
             return True
         except Exception as e:
             print(f"驗證工作簿時發生錯誤: {e}")
-            return False
\ No newline at end of file
+            return False
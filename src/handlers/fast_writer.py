@@ -0,0 +1,105 @@
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from openpyxl import Workbook
+
+from ..models import AccountingEntry
+from .excel_handler import iter_sheet_rows, read_header_row, replace_file
+from .ledger_schema import HEADERS, LedgerSchema
+
+
+def write_entries_fast(file_path: str, entries: Iterable[AccountingEntry],
+                       headers: Sequence[str] = HEADERS, batch_size: int = 1000,
+                       progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    以唯寫模式依序寫出記帳項目，寫入暫存檔後原子取代目標檔案
+    不會在記憶體中建立完整的活頁簿，適合建立、壓縮或重寫大型帳本
+    Args:
+        file_path: 輸出的 Excel 檔案路徑
+        entries: 記帳項目（可為產生器）
+        headers: 標題列，可重新排序或包含額外欄位（額外欄位留白）
+        batch_size: 每批寫出的列數
+        progress: 進度回呼，參數為已寫出的列數
+    Returns:
+        寫出的記帳項目筆數
+    Raises:
+        ValueError: 標題列缺少必要欄位
+    """
+    schema = LedgerSchema.from_header_row(headers)
+    if schema is None:
+        raise ValueError("標題列缺少必要欄位")
+    rows = (schema.encode(entry) for entry in entries)
+    return _write_rows(file_path, headers, rows, batch_size, progress)
+
+
+def _write_rows(file_path: str, headers: Sequence[Any], rows: Iterable[List[Any]],
+                batch_size: int, progress: Optional[Callable[[int], None]]) -> int:
+    """以唯寫模式寫出標題列與資料列，寫入暫存檔後原子取代目標檔案"""
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(list(headers))
+
+    written = 0
+    batch: List[List[Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            written = _append_batch(worksheet, batch, written, progress)
+            batch = []
+    if batch:
+        written = _append_batch(worksheet, batch, written, progress)
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=directory)
+    os.close(fd)
+    try:
+        workbook.save(temp_path)
+        replace_file(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
+
+
+def _append_batch(worksheet: Any, batch: List[List[Any]], written: int,
+                  progress: Optional[Callable[[int], None]]) -> int:
+    """寫出一個批次並回報進度，返回累計寫出的列數"""
+    for row in batch:
+        worksheet.append(row)
+    written += len(batch)
+    if progress:
+        progress(written)
+    return written
+
+
+def compact_ledger(file_path: str, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    壓縮帳本：移除空白與無效的列，保留原本的欄位順序與額外欄位
+    讀取與寫出皆為串流處理
+    Returns:
+        {'kept': 保留筆數, 'dropped': 移除的列數}
+    Raises:
+        ValueError: 標題列缺少必要欄位
+    """
+    stats = {'kept': 0, 'dropped': 0}
+    headers = read_header_row(file_path)
+    schema = LedgerSchema.from_header_row(headers)
+    if schema is None:
+        raise ValueError(f"工作表標題列缺少必要欄位：{file_path}")
+
+    def valid_rows() -> Iterator[List[Any]]:
+        for _, row in iter_sheet_rows(file_path):
+            try:
+                entry = schema.decode(row) if any(row) else None
+            except Exception:
+                entry = None
+            if entry is None or not entry.validate():
+                stats['dropped'] += 1
+                continue
+            # 記帳欄位依解析結果重寫，額外欄位保留原值
+            yield schema.encode(entry, base=row)
+
+    stats['kept'] = _write_rows(file_path, headers, valid_rows(), batch_size, None)
+    return stats
@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import os
+import struct
+import tempfile
+from contextlib import nullcontext
+from dataclasses import fields
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Sequence, Tuple
+
+from ..models import AccountingEntry
+from ..utils.memory_budget import MemoryBudget, MemoryGuard, guarded
+from .excel_handler import iter_sheet_rows, load_sheet_schema, replace_file
+
+
+# 匯出欄位順序，與 AccountingEntry 的欄位一致
+EXPORT_FIELDS = [f.name for f in fields(AccountingEntry)]
+
+# 分塊欄式檔案的檔頭
+COLUMNAR_MAGIC = b'ACOL1\n'
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class _CsvWriter:
+    """CSV 格式輸出"""
+
+    def __init__(self, stream: IO[bytes]):
+        self._text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        self._writer = csv.DictWriter(self._text, fieldnames=EXPORT_FIELDS)
+        self._writer.writeheader()
+
+    def write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(batch)
+        self._text.flush()
+
+    def close(self) -> None:
+        # 只釋放文字包裝，底層檔案由呼叫端關閉
+        self._text.flush()
+        self._text.detach()
+
+
+class _JsonLinesWriter:
+    """JSON Lines 格式輸出，每列一個 JSON 物件"""
+
+    def __init__(self, stream: IO[bytes]):
+        self._stream = stream
+
+    def write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        lines = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in batch)
+        self._stream.write(lines.encode('utf-8'))
+
+    def close(self) -> None:
+        pass
+
+
+class _ColumnarWriter:
+    """
+    分塊欄式格式輸出
+    每個批次以 4 位元組長度開頭，內容為各欄位的值陣列（JSON 編碼）
+    """
+
+    def __init__(self, stream: IO[bytes]):
+        self._stream = stream
+        self._stream.write(COLUMNAR_MAGIC)
+
+    def write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        chunk = {
+            'rows': len(batch),
+            'columns': {name: [row[name] for row in batch] for name in EXPORT_FIELDS}
+        }
+        payload = json.dumps(chunk, ensure_ascii=False).encode('utf-8')
+        self._stream.write(struct.pack('>I', len(payload)))
+        self._stream.write(payload)
+
+    def close(self) -> None:
+        pass
+
+
+WRITERS = {
+    'csv': _CsvWriter,
+    'jsonl': _JsonLinesWriter,
+    'columnar': _ColumnarWriter
+}
+
+
+def read_columnar(file_path: str) -> Iterator[Dict[str, List[Any]]]:
+    """
+    逐批讀取分塊欄式檔案
+    Yields:
+        每個批次的 {欄位名稱: 值陣列}
+    """
+    with open(file_path, 'rb') as stream:
+        if stream.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"不是有效的欄式匯出檔案：{file_path}")
+        while True:
+            header = stream.read(4)
+            if not header:
+                return
+            (length,) = struct.unpack('>I', header)
+            yield json.loads(stream.read(length).decode('utf-8'))['columns']
+
+
+class LedgerExporter:
+    """以串流方式將記帳資料匯出為 CSV、JSON Lines 或分塊欄式檔案，記憶體用量固定"""
+
+    def __init__(self, file_path: str, batch_size: int = 1000,
+                 memory_budget: Optional[MemoryBudget] = None):
+        """
+        初始化匯出器
+        Args:
+            file_path: 來源 Excel 檔案路徑
+            batch_size: 每批寫出的列數
+            memory_budget: 記憶體預算，超過時中止匯出
+        """
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.memory_budget = memory_budget
+
+    def export(self, output_path: str, fmt: str = 'csv',
+               year: Optional[str] = None, month: Optional[str] = None,
+               platform: Optional[str] = None,
+               progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+        """
+        匯出記帳資料
+        Args:
+            output_path: 輸出檔案路徑
+            fmt: 輸出格式（csv、jsonl、columnar）
+            year: 只匯出指定年份
+            month: 只匯出指定月份
+            platform: 只匯出指定平台
+            progress: 進度回呼，參數為 (已掃描列數, 已匯出列數)
+        Returns:
+            {'scanned': 已掃描列數, 'exported': 已匯出列數, 'skipped': 無效列數}
+        """
+        if fmt not in WRITERS:
+            raise ValueError(f"不支援的匯出格式：{fmt}")
+
+        stats = {'scanned': 0, 'exported': 0, 'skipped': 0}
+        guard = self.memory_budget.guard('export') if self.memory_budget else None
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with guard or nullcontext(), os.fdopen(fd, 'wb') as stream:
+                writer = WRITERS[fmt](stream)
+                batch: List[Dict[str, Any]] = []
+                for entry in self._scan(stats, year, month, platform, guard):
+                    batch.append(entry.to_dict())
+                    if len(batch) >= self.batch_size:
+                        self._write(writer, batch, stats, progress)
+                        batch = []
+                if batch:
+                    self._write(writer, batch, stats, progress)
+                writer.close()
+            replace_file(temp_path, output_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return stats
+
+    def _scan(self, stats: Dict[str, int], year: Optional[str], month: Optional[str],
+              platform: Optional[str],
+              guard: Optional[MemoryGuard] = None) -> Iterator[AccountingEntry]:
+        """掃描工作表，在轉換型別前先以原始值套用篩選條件"""
+        schema = load_sheet_schema(self.file_path)
+        filters = []
+        if year is not None:
+            filters.append((schema.index('year'), str(year), False))
+        if month is not None:
+            filters.append((schema.index('month'), str(month).zfill(2), True))
+        if platform is not None:
+            filters.append((schema.index('platform'), platform, False))
+
+        for _, row in guarded(iter_sheet_rows(self.file_path), guard):
+            stats['scanned'] += 1
+            if not any(row):
+                continue
+            if not self._matches(row, filters):
+                continue
+            try:
+                entry = schema.decode(row)
+            except Exception:
+                stats['skipped'] += 1
+                continue
+            if not entry.validate():
+                stats['skipped'] += 1
+                continue
+            yield entry
+
+    @staticmethod
+    def _matches(row: Sequence[Any], filters: List[Tuple[int, str, bool]]) -> bool:
+        """檢查原始列是否符合篩選條件（欄位位置, 期望值, 是否補零至兩位）"""
+        for index, expected, pad in filters:
+            value = str(row[index])
+            if pad:
+                value = value.zfill(2)
+            if value != expected:
+                return False
+        return True
+
+    @staticmethod
+    def _write(writer: Any, batch: List[Dict[str, Any]], stats: Dict[str, int],
+               progress: Optional[ProgressCallback]) -> None:
+        """寫出一個批次並回報進度"""
+        writer.write_batch(batch)
+        stats['exported'] += len(batch)
+        if progress:
+            progress(stats['scanned'], stats['exported'])
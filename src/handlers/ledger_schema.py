@@ -0,0 +1,123 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..models import AccountingEntry
+
+
+# 欄位定義：(欄位名稱, 標題, 型別轉換函式)
+COLUMN_SPECS: List[Tuple[str, str, Callable[[Any], Any]]] = [
+    ('year', '年份', str),
+    ('month', '月份', str),
+    ('day', '日期', str),
+    ('time', '時間', str),
+    ('platform', '平台', str),
+    ('product_name', '商品名稱', str),
+    ('order_quantity', '訂單數量', int),
+    ('total_sales', '銷售總額', float),
+    ('platform_fee', '平台費用', float),
+    ('actual_income', '實收金額', float),
+    ('invoice_required', '需要發票', bool),
+    ('taxable', '應稅', bool)
+]
+
+HEADERS = [header for _, header, _ in COLUMN_SPECS]
+FIELDS = [name for name, _, _ in COLUMN_SPECS]
+
+_DECODERS = {name: decoder for name, _, decoder in COLUMN_SPECS}
+_HEADER_TO_FIELD = {header: name for name, header, _ in COLUMN_SPECS}
+
+Decoder = Tuple[str, int, Callable[[Any], Any]]
+
+
+class LedgerSchema:
+    """依標題名稱對應工作表欄位，支援欄位重新排序與額外欄位"""
+
+    def __init__(self, positions: Dict[str, int], width: int):
+        """
+        初始化欄位對應
+        Args:
+            positions: 欄位名稱對應到欄位位置（從 0 開始）
+            width: 工作表的欄位數
+        """
+        self.positions = positions
+        self.width = width
+        self._compiled: Dict[Tuple[str, ...], List[Decoder]] = {}
+
+    @classmethod
+    def default(cls) -> 'LedgerSchema':
+        """預設的 12 欄版面"""
+        return cls({name: index for index, name in enumerate(FIELDS)}, len(FIELDS))
+
+    @classmethod
+    def from_header_row(cls, header_row: Sequence[Any]) -> Optional['LedgerSchema']:
+        """
+        依標題列建立欄位對應
+        Returns:
+            缺少任何必要欄位時返回 None
+        """
+        positions: Dict[str, int] = {}
+        for index, header in enumerate(header_row):
+            name = _HEADER_TO_FIELD.get(str(header).strip()) if header is not None else None
+            if name and name not in positions:
+                positions[name] = index
+        if len(positions) != len(FIELDS):
+            return None
+        return cls(positions, len(header_row))
+
+    @staticmethod
+    def missing_headers(header_row: Sequence[Any]) -> List[str]:
+        """列出標題列缺少的必要欄位標題"""
+        present = {str(header).strip() for header in header_row if header is not None}
+        return [header for header in HEADERS if header not in present]
+
+    @staticmethod
+    def resolve(name: str) -> str:
+        """將欄位名稱或標題轉換為欄位名稱"""
+        if name in _DECODERS:
+            return name
+        if name in _HEADER_TO_FIELD:
+            return _HEADER_TO_FIELD[name]
+        raise ValueError(f"未知的欄位：{name}")
+
+    def index(self, name: str) -> int:
+        """取得欄位位置（從 0 開始）"""
+        return self.positions[self.resolve(name)]
+
+    def column(self, name: str) -> int:
+        """取得 Excel 欄號（從 1 開始）"""
+        return self.index(name) + 1
+
+    def compile(self, names: Optional[Iterable[str]] = None) -> List[Decoder]:
+        """
+        產生指定欄位的轉換器清單，結果會被快取
+        Args:
+            names: 欄位名稱或標題，未指定時為全部欄位
+        """
+        key = tuple(self.resolve(name) for name in names) if names is not None else tuple(FIELDS)
+        decoders = self._compiled.get(key)
+        if decoders is None:
+            decoders = [(name, self.positions[name], _DECODERS[name]) for name in key]
+            self._compiled[key] = decoders
+        return decoders
+
+    def decode_fields(self, row: Sequence[Any],
+                      decoders: List[Decoder]) -> Dict[str, Any]:
+        """只轉換指定的欄位"""
+        return {name: decoder(row[index]) for name, index, decoder in decoders}
+
+    def decode(self, row: Sequence[Any]) -> AccountingEntry:
+        """將工作表的一列資料轉換為記帳項目"""
+        return AccountingEntry.from_dict(self.decode_fields(row, self.compile()))
+
+    def encode(self, entry: AccountingEntry,
+               base: Optional[Sequence[Any]] = None) -> List[Any]:
+        """
+        將記帳項目轉換為工作表的一列資料
+        Args:
+            base: 原本的列資料，用於保留額外欄位的值；未指定時額外欄位留白
+        """
+        row: List[Any] = list(base) if base is not None else []
+        if len(row) < self.width:
+            row.extend([None] * (self.width - len(row)))
+        for name, value in entry.to_dict().items():
+            row[self.positions[name]] = value
+        return row
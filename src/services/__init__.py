@@ -0,0 +1,24 @@
+from .analytics import LedgerAnalytics, QuantileSketch, TopN, analyze_entries, analyze_file
+from .history import OperationHistory, Delta
+from .reconciliation import Reconciler, ReconciliationResult
+from .tax_ledger import TaxLedger, PeriodTotals, period_of
+from .workbook_diff import WorkbookDiff, MergeResult, diff_workbooks, merge_diff
+
+__all__ = [
+    'LedgerAnalytics',
+    'QuantileSketch',
+    'TopN',
+    'analyze_entries',
+    'analyze_file',
+    'OperationHistory',
+    'Delta',
+    'Reconciler',
+    'ReconciliationResult',
+    'TaxLedger',
+    'PeriodTotals',
+    'period_of',
+    'WorkbookDiff',
+    'MergeResult',
+    'diff_workbooks',
+    'merge_diff'
+]
@@ -0,0 +1,247 @@
+import heapq
+import itertools
+import math
+from contextlib import nullcontext
+from typing import Any, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from ..models import AccountingEntry
+from ..handlers.excel_handler import iter_ledger_entries
+from ..utils.memory_budget import MemoryBudget, guarded
+from ..utils.validators import parse_month
+
+T = TypeVar('T')
+
+
+class TopN(Generic[T]):
+    """以大小固定的最小堆積保留分數最高的 N 個項目"""
+
+    def __init__(self, n: int):
+        """
+        初始化
+        Args:
+            n: 保留的項目數
+        """
+        self.n = n
+        self._heap: List[Tuple[float, int, T]] = []
+        self._counter = itertools.count()
+
+    def push(self, score: float, item: T) -> None:
+        """加入項目，堆積已滿時只保留分數較高者"""
+        if self.n <= 0:
+            return
+        entry = (score, next(self._counter), item)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other: 'TopN[T]') -> None:
+        """合併另一個部分結果"""
+        for score, _, item in other._heap:
+            self.push(score, item)
+
+    def items(self) -> List[Tuple[T, float]]:
+        """依分數由高至低排列的 (項目, 分數)"""
+        return [(item, score) for score, _, item in sorted(self._heap, reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class QuantileSketch:
+    """
+    可合併的近似分位數摘要（對數分桶）
+    任何分位數的相對誤差不超過 relative_accuracy，記憶體只與數值範圍有關
+    """
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        初始化
+        Args:
+            relative_accuracy: 允許的相對誤差
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy 必須介於 0 與 1 之間")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        """加入一個非負數值"""
+        if value < 0:
+            raise ValueError("QuantileSketch 只接受非負數值")
+        if value < self.MIN_VALUE:
+            self._zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """合併另一個相同精度的摘要"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("只能合併相同精度的 QuantileSketch")
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        取得近似分位數
+        Args:
+            q: 0 到 1 之間的分位，例如 0.5 為中位數
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q 必須介於 0 與 1 之間")
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+def quarter_of(month: str) -> Optional[int]:
+    """月份所屬的季度（1-4），月份無效時返回 None"""
+    value = parse_month(month)
+    return (value - 1) // 3 + 1 if value is not None else None
+
+
+class LedgerAnalytics:
+    """
+    單次串流統計：商品實收金額排名、單筆訂單金額排名與各平台訂單金額分位數
+    不同檔案或分段的部分結果可以用 merge() 合併
+    """
+
+    def __init__(self, year: Optional[str] = None, quarter: Optional[int] = None,
+                 top_orders: int = 50, relative_accuracy: float = 0.01):
+        """
+        初始化
+        Args:
+            year: 只統計指定年份
+            quarter: 只統計指定季度（1-4）
+            top_orders: 保留實收金額最高的訂單筆數
+            relative_accuracy: 分位數的相對誤差
+        """
+        self.year = str(year) if year is not None else None
+        self.quarter = quarter
+        self.relative_accuracy = relative_accuracy
+        self.entries = 0
+        # 指定季度時月份無效而略過的筆數
+        self.skipped = 0
+        self.total_income = 0.0
+        self.product_income: Dict[str, float] = {}
+        self.platform_orders: Dict[str, QuantileSketch] = {}
+        self.top_orders: TopN[AccountingEntry] = TopN(top_orders)
+
+    def matches(self, entry: AccountingEntry) -> bool:
+        """是否符合統計期間（月份無效時不符合任何季度）"""
+        if self.year is not None and entry.year != self.year:
+            return False
+        if self.quarter is not None and quarter_of(entry.month) != self.quarter:
+            return False
+        return True
+
+    def add(self, entry: AccountingEntry) -> None:
+        """加入一筆記帳項目"""
+        if self.quarter is not None and quarter_of(entry.month) is None:
+            self.skipped += 1
+            return
+        if not self.matches(entry):
+            return
+        self.entries += 1
+        self.total_income += entry.actual_income
+        self.product_income[entry.product_name] = (
+            self.product_income.get(entry.product_name, 0.0) + entry.actual_income
+        )
+        sketch = self.platform_orders.get(entry.platform)
+        if sketch is None:
+            sketch = self.platform_orders[entry.platform] = QuantileSketch(self.relative_accuracy)
+        sketch.add(entry.total_sales)
+        self.top_orders.push(entry.actual_income, entry)
+
+    def consume(self, entries: Iterable[AccountingEntry]) -> 'LedgerAnalytics':
+        """逐筆加入記帳項目"""
+        for entry in entries:
+            self.add(entry)
+        return self
+
+    def merge(self, other: 'LedgerAnalytics') -> 'LedgerAnalytics':
+        """合併另一個部分結果"""
+        self.entries += other.entries
+        self.skipped += other.skipped
+        self.total_income += other.total_income
+        for product, income in other.product_income.items():
+            self.product_income[product] = self.product_income.get(product, 0.0) + income
+        for platform, sketch in other.platform_orders.items():
+            if platform in self.platform_orders:
+                self.platform_orders[platform].merge(sketch)
+            else:
+                merged = self.platform_orders[platform] = QuantileSketch(sketch.relative_accuracy)
+                merged.merge(sketch)
+        self.top_orders.merge(other.top_orders)
+        return self
+
+    def top_products(self, n: int = 50) -> List[Tuple[str, float]]:
+        """實收金額最高的 N 項商品"""
+        return heapq.nlargest(n, self.product_income.items(), key=lambda item: item[1])
+
+    def platform_quantile(self, platform: str, q: float) -> Optional[float]:
+        """指定平台的訂單金額分位數"""
+        sketch = self.platform_orders.get(platform)
+        return sketch.quantile(q) if sketch else None
+
+    def platform_medians(self) -> Dict[str, Optional[float]]:
+        """各平台的訂單金額中位數"""
+        return {platform: sketch.quantile(0.5)
+                for platform, sketch in sorted(self.platform_orders.items())}
+
+    def summary(self) -> Dict[str, Any]:
+        """統計摘要"""
+        return {
+            'entries': self.entries,
+            'skipped': self.skipped,
+            'total_income': self.total_income,
+            'products': len(self.product_income),
+            'platforms': sorted(self.platform_orders)
+        }
+
+
+def analyze_entries(entries: Iterable[AccountingEntry], **options: Any) -> LedgerAnalytics:
+    """統計一組記帳項目，options 與 LedgerAnalytics 相同"""
+    return LedgerAnalytics(**options).consume(entries)
+
+
+def analyze_file(file_path: str, memory_budget: Optional[MemoryBudget] = None,
+                 **options: Any) -> LedgerAnalytics:
+    """
+    以唯讀串流方式統計帳本檔案
+    Args:
+        file_path: Excel 檔案路徑
+        memory_budget: 記憶體預算，超過時中止
+        options: 與 LedgerAnalytics 相同
+    """
+    guard = memory_budget.guard('report') if memory_budget else None
+    with guard or nullcontext():
+        entries = (entry for _, entry in guarded(iter_ledger_entries(file_path), guard))
+        return analyze_entries(entries, **options)
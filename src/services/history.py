@@ -0,0 +1,164 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Optional, Tuple
+
+from ..models import AccountingEntry
+from ..handlers import ExcelHandler
+from ..handlers.ledger_schema import FIELDS
+
+
+def _pack(entry: Optional[AccountingEntry]) -> Optional[Tuple[Any, ...]]:
+    """將記帳項目壓縮為欄位值的元組"""
+    if entry is None:
+        return None
+    return tuple(getattr(entry, name) for name in FIELDS)
+
+
+def _unpack(values: Optional[Tuple[Any, ...]]) -> Optional[AccountingEntry]:
+    """由欄位值的元組還原記帳項目"""
+    if values is None:
+        return None
+    return AccountingEntry.from_dict(dict(zip(FIELDS, values)))
+
+
+@dataclass(frozen=True)
+class Delta:
+    """單次變更的前後差異（只記錄受影響的一列）"""
+    kind: str  # 'add'、'insert'、'update' 或 'delete'
+    row_index: int
+    before: Optional[Tuple[Any, ...]]
+    after: Optional[Tuple[Any, ...]]
+
+    @property
+    def description(self) -> str:
+        """變更的簡短說明"""
+        names = {'add': '新增', 'insert': '新增', 'update': '修改', 'delete': '刪除'}
+        values = self.after if self.after is not None else self.before
+        product = values[FIELDS.index('product_name')] if values else ''
+        return f"{names.get(self.kind, self.kind)}第 {self.row_index - 1} 筆（{product}）"
+
+
+class OperationHistory:
+    """
+    以差異紀錄實作的復原／重做
+    每次變更只保存受影響列的前後內容，記憶體用量以環狀緩衝區限制
+    紀錄只在本次執行期間有效，重新開啟程式或重新載入檔案時清除
+    """
+
+    def __init__(self, capacity: int = 100):
+        """
+        初始化操作紀錄
+        Args:
+            capacity: 最多可復原的步數
+        """
+        self.capacity = capacity
+        self._undo: Deque[Delta] = deque(maxlen=capacity)
+        self._redo: Deque[Delta] = deque(maxlen=capacity)
+        self._handler: Optional[ExcelHandler] = None
+        self._applying = False
+
+    def attach(self, handler: ExcelHandler) -> 'OperationHistory':
+        """開始記錄處理器的變更"""
+        self.detach()
+        self.clear()
+        self._handler = handler
+        handler.add_listener(self._on_change)
+        return self
+
+    def detach(self) -> None:
+        """停止記錄"""
+        if self._handler:
+            self._handler.remove_listener(self._on_change)
+            self._handler = None
+
+    @property
+    def can_undo(self) -> bool:
+        """是否有可復原的變更"""
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        """是否有可重做的變更"""
+        return bool(self._redo)
+
+    def peek_undo(self) -> Optional[Delta]:
+        """下一個可復原的變更"""
+        return self._undo[-1] if self._undo else None
+
+    def peek_redo(self) -> Optional[Delta]:
+        """下一個可重做的變更"""
+        return self._redo[-1] if self._redo else None
+
+    def clear(self) -> None:
+        """清除所有紀錄"""
+        self._undo.clear()
+        self._redo.clear()
+
+    def undo(self) -> Optional[Delta]:
+        """
+        復原最近一次變更
+        Returns:
+            被復原的變更；沒有可復原的變更或套用失敗時返回 None
+        """
+        if not self._undo or not self._handler:
+            return None
+        delta = self._undo.pop()
+        if not self._apply(delta, reverse=True):
+            self._undo.append(delta)
+            return None
+        self._redo.append(delta)
+        return delta
+
+    def redo(self) -> Optional[Delta]:
+        """
+        重做最近一次復原的變更
+        Returns:
+            被重做的變更；沒有可重做的變更或套用失敗時返回 None
+        """
+        if not self._redo or not self._handler:
+            return None
+        delta = self._redo.pop()
+        if not self._apply(delta, reverse=False):
+            self._redo.append(delta)
+            return None
+        self._undo.append(delta)
+        return delta
+
+    def _on_change(self, kind: str, row_index: int,
+                   before: Optional[AccountingEntry], after: Optional[AccountingEntry]) -> None:
+        """處理帳本變更通知"""
+        if self._applying:
+            return
+        if kind == 'reload':
+            self.clear()
+            return
+        if kind == 'update' and before is None:
+            # 原本的列無法解析，無法還原
+            return
+        if kind == 'delete' and before is None:
+            # 無法解析的列已被刪除，後續列往上移，既有紀錄的列索引已不正確
+            self.clear()
+            return
+        delta = Delta(kind, row_index, _pack(before), _pack(after))
+        self._undo.append(delta)
+        self._redo.clear()
+
+    def _apply(self, delta: Delta, reverse: bool) -> bool:
+        """套用變更（reverse 為 True 時套用反向變更），過程中不記錄"""
+        handler = self._handler
+        self._applying = True
+        try:
+            if delta.kind in ('add', 'insert'):
+                if reverse:
+                    return handler.delete_entry(delta.row_index)
+                return handler.insert_entry(delta.row_index, _unpack(delta.after))
+            if delta.kind == 'update':
+                target = delta.before if reverse else delta.after
+                return handler.update_entry(delta.row_index, _unpack(target))
+            if delta.kind == 'delete':
+                if reverse:
+                    return handler.insert_entry(delta.row_index, _unpack(delta.before))
+                return handler.delete_entry(delta.row_index)
+            return False
+        finally:
+            self._applying = False
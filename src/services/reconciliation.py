@@ -0,0 +1,307 @@
+import csv
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ..models import AccountingEntry
+from ..handlers.excel_handler import iter_ledger_entries
+
+
+# 對帳單欄位名稱（可依平台報表調整）
+DEFAULT_STATEMENT_COLUMNS = {
+    'order_time': '訂單時間',
+    'product_name': '商品名稱',
+    'total_sales': '銷售總額',
+    'platform_fee': '平台費用',
+    'actual_income': '實收金額'
+}
+
+# 預設的對帳鍵：訂單時間 + 商品名稱 + 金額
+DEFAULT_KEY_FIELDS = ('order_time', 'product_name', 'total_sales')
+
+# 需要比對的金額欄位
+AMOUNT_FIELDS = ('total_sales', 'platform_fee', 'actual_income')
+
+# 第二輪配對的鍵：金額不同時仍以訂單時間與商品名稱找出同一筆訂單
+FALLBACK_KEY_FIELDS = ('order_time', 'product_name')
+
+# 金額欄位中可忽略的貨幣符號與千分位
+_AMOUNT_NOISE = ('NT$', 'NTD', '$', '元', ',')
+
+TIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y/%m/%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S'
+)
+
+
+def normalize_order_time(value: Any) -> str:
+    """將各種日期時間格式統一為 YYYY-MM-DD HH:MM:SS"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    text = str(value).strip()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            continue
+    return text
+
+
+def entry_order_time(entry: AccountingEntry) -> str:
+    """組合記帳項目的訂單時間"""
+    return normalize_order_time(
+        f"{entry.year}-{entry.month.zfill(2)}-{entry.day.zfill(2)} {entry.time}"
+    )
+
+
+def _amount_key(value: float) -> int:
+    """金額以「分」為單位的整數作為鍵，避免浮點誤差"""
+    return int(round(float(value) * 100))
+
+
+def parse_amount(value: Optional[str]) -> Optional[float]:
+    """
+    解析對帳單上的金額，移除貨幣符號與千分位
+    Returns:
+        空白時返回 None
+    Raises:
+        ValueError: 不是有效的金額
+    """
+    text = (value or '').strip()
+    for noise in _AMOUNT_NOISE:
+        text = text.replace(noise, '')
+    text = text.strip()
+    if not text:
+        return None
+    return float(text)
+
+
+@dataclass
+class StatementRow:
+    """對帳單上的一列資料"""
+    line_number: int
+    order_time: str
+    product_name: str
+    amounts: Dict[str, float]
+    raw: Dict[str, str]
+    # 無法解析的金額欄位：{欄位名稱: 原始值}，這些欄位視為缺少、不比對
+    invalid_amounts: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class FieldMismatch:
+    """單一欄位的金額差異"""
+    field: str
+    ledger_value: float
+    statement_value: float
+
+    @property
+    def difference(self) -> float:
+        """差額（對帳單減帳本）"""
+        return self.statement_value - self.ledger_value
+
+
+@dataclass
+class Mismatch:
+    """對帳鍵相符但金額不一致的項目"""
+    row_index: int
+    entry: AccountingEntry
+    statement: StatementRow
+    differences: List[FieldMismatch]
+
+
+@dataclass
+class ReconciliationResult:
+    """對帳結果"""
+    matched: List[Tuple[int, int]] = field(default_factory=list)
+    ledger_only: List[Tuple[int, AccountingEntry]] = field(default_factory=list)
+    statement_only: List[StatementRow] = field(default_factory=list)
+    mismatches: List[Mismatch] = field(default_factory=list)
+    # 含有無法解析金額的對帳單列（仍參與配對，但該欄位不比對）
+    invalid_rows: List[StatementRow] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, int]:
+        """取得各類結果的筆數"""
+        return {
+            'matched': len(self.matched),
+            'ledger_only': len(self.ledger_only),
+            'statement_only': len(self.statement_only),
+            'mismatches': len(self.mismatches),
+            'invalid_rows': len(self.invalid_rows)
+        }
+
+
+class Reconciler:
+    """以雜湊合併比對帳本與平台對帳單，時間複雜度為線性"""
+
+    def __init__(self, key_fields: Sequence[str] = DEFAULT_KEY_FIELDS,
+                 columns: Optional[Dict[str, str]] = None,
+                 tolerance: float = 0.005):
+        """
+        初始化對帳器
+        Args:
+            key_fields: 對帳鍵欄位，可用 order_time、product_name 及金額欄位
+            columns: 欄位對應到對帳單欄位名稱，未指定者使用預設值
+            tolerance: 金額允許的誤差
+        """
+        allowed = ('order_time', 'product_name') + AMOUNT_FIELDS
+        for name in key_fields:
+            if name not in allowed:
+                raise ValueError(f"不支援的對帳鍵欄位：{name}")
+        self.key_fields = tuple(key_fields)
+        self.columns = dict(DEFAULT_STATEMENT_COLUMNS)
+        if columns:
+            self.columns.update(columns)
+        self.tolerance = tolerance
+
+    def reconcile(self, ledger: Iterable[Tuple[int, AccountingEntry]],
+                  statement: Iterable[StatementRow]) -> ReconciliationResult:
+        """
+        比對帳本與對帳單
+        對帳鍵包含金額時，第一輪未配對的項目會再以訂單時間與商品名稱配對，
+        讓金額不同的同一筆訂單列為金額不一致，而不是分成兩邊各一筆
+        Args:
+            ledger: (列索引, 記帳項目) 序列
+            statement: 對帳單資料列
+        """
+        result = ReconciliationResult()
+
+        # 建立帳本的雜湊表，相同鍵的項目依出現順序配對
+        table: Dict[Tuple[Any, ...], Deque[Tuple[int, AccountingEntry]]] = {}
+        for row_index, entry in ledger:
+            table.setdefault(self._entry_key(entry, self.key_fields), deque()).append(
+                (row_index, entry))
+
+        # 逐列探查對帳單
+        unmatched: List[StatementRow] = []
+        for row in statement:
+            if row.invalid_amounts:
+                result.invalid_rows.append(row)
+            bucket = table.get(self._statement_key(row, self.key_fields))
+            if not bucket:
+                unmatched.append(row)
+                continue
+            row_index, entry = bucket.popleft()
+            self._record(result, row_index, entry, row)
+
+        leftovers = [item for bucket in table.values() for item in bucket]
+        if unmatched and leftovers and any(name in AMOUNT_FIELDS for name in self.key_fields):
+            # 第二輪：剩餘項目只依訂單時間與商品名稱配對
+            fallback: Dict[Tuple[Any, ...], Deque[Tuple[int, AccountingEntry]]] = {}
+            for row_index, entry in sorted(leftovers, key=lambda item: item[0]):
+                fallback.setdefault(self._entry_key(entry, FALLBACK_KEY_FIELDS), deque()).append(
+                    (row_index, entry))
+            remaining: List[StatementRow] = []
+            for row in unmatched:
+                bucket = fallback.get(self._statement_key(row, FALLBACK_KEY_FIELDS))
+                if not bucket:
+                    remaining.append(row)
+                    continue
+                row_index, entry = bucket.popleft()
+                self._record(result, row_index, entry, row)
+            unmatched = remaining
+            leftovers = [item for bucket in fallback.values() for item in bucket]
+
+        result.statement_only.extend(unmatched)
+        result.ledger_only.extend(sorted(leftovers, key=lambda item: item[0]))
+        result.matched.sort()
+        result.mismatches.sort(key=lambda mismatch: mismatch.row_index)
+        return result
+
+    def _record(self, result: ReconciliationResult, row_index: int,
+                entry: AccountingEntry, row: StatementRow) -> None:
+        """記錄一組已配對的項目"""
+        differences = self._compare(entry, row)
+        if differences:
+            result.mismatches.append(Mismatch(row_index, entry, row, differences))
+        else:
+            result.matched.append((row_index, row.line_number))
+
+    def reconcile_files(self, ledger_path: str, statement_path: str,
+                        encoding: str = 'utf-8-sig') -> ReconciliationResult:
+        """以串流方式讀取帳本 Excel 檔與對帳單 CSV 後比對"""
+        return self.reconcile(
+            iter_ledger_entries(ledger_path),
+            self.read_statement(statement_path, encoding)
+        )
+
+    def read_statement(self, file_path: str,
+                       encoding: str = 'utf-8-sig') -> Iterator[StatementRow]:
+        """逐列讀取對帳單 CSV"""
+        with open(file_path, encoding=encoding, newline='') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            for name in ('order_time', 'product_name'):
+                if self.columns[name] not in fieldnames:
+                    raise ValueError(f"對帳單缺少欄位：{self.columns[name]}")
+            amount_columns = {
+                name: self.columns[name] for name in AMOUNT_FIELDS
+                if self.columns[name] in fieldnames
+            }
+
+            # 標題列為第 1 行
+            for line_number, raw in enumerate(reader, start=2):
+                amounts = {}
+                invalid = {}
+                for name, column in amount_columns.items():
+                    value = raw.get(column)
+                    try:
+                        amount = parse_amount(value)
+                    except ValueError:
+                        # 例如 '-'、'N/A'：視為缺少該欄位，並記錄於結果中
+                        invalid[name] = value
+                        continue
+                    if amount is not None:
+                        amounts[name] = amount
+                yield StatementRow(
+                    line_number=line_number,
+                    order_time=normalize_order_time(raw[self.columns['order_time']]),
+                    product_name=(raw[self.columns['product_name']] or '').strip(),
+                    amounts=amounts,
+                    raw=raw,
+                    invalid_amounts=invalid
+                )
+
+    @staticmethod
+    def _entry_key(entry: AccountingEntry, key_fields: Sequence[str]) -> Tuple[Any, ...]:
+        """計算記帳項目的對帳鍵"""
+        key = []
+        for name in key_fields:
+            if name == 'order_time':
+                key.append(entry_order_time(entry))
+            elif name == 'product_name':
+                key.append(entry.product_name.strip())
+            else:
+                key.append(_amount_key(getattr(entry, name)))
+        return tuple(key)
+
+    @staticmethod
+    def _statement_key(row: StatementRow, key_fields: Sequence[str]) -> Tuple[Any, ...]:
+        """計算對帳單資料列的對帳鍵"""
+        key = []
+        for name in key_fields:
+            if name == 'order_time':
+                key.append(row.order_time)
+            elif name == 'product_name':
+                key.append(row.product_name)
+            elif name in row.amounts:
+                key.append(_amount_key(row.amounts[name]))
+            else:
+                key.append(None)
+        return tuple(key)
+
+    def _compare(self, entry: AccountingEntry, row: StatementRow) -> List[FieldMismatch]:
+        """比對金額欄位，對帳單沒有的欄位不比對"""
+        differences = []
+        for name in AMOUNT_FIELDS:
+            if name not in row.amounts:
+                continue
+            ledger_value = float(getattr(entry, name))
+            statement_value = row.amounts[name]
+            if abs(ledger_value - statement_value) > self.tolerance:
+                differences.append(FieldMismatch(name, ledger_value, statement_value))
+        return differences
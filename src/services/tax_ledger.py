@@ -0,0 +1,246 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from openpyxl import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+
+from ..models import AccountingEntry
+from ..handlers import ExcelHandler
+from ..handlers.excel_handler import replace_file
+from ..utils.validators import parse_month
+
+
+# 營業稅稅率（銷售額為含稅金額）
+TAX_RATE = 0.05
+
+
+def period_of(month: str) -> Optional[int]:
+    """月份所屬的營業稅申報期別（1-6，每兩個月一期），月份無效時返回 None"""
+    value = parse_month(month)
+    return (value - 1) // 2 + 1 if value is not None else None
+
+
+def period_label(year: str, period: int) -> str:
+    """申報期別名稱，例如 2025 年 01-02 月"""
+    return f"{year} 年 {period * 2 - 1:02d}-{period * 2:02d} 月"
+
+
+def _cents(value: float) -> int:
+    """金額轉換為以「分」為單位的整數"""
+    return int(round(float(value) * 100))
+
+
+@dataclass
+class PeriodTotals:
+    """單一申報期別的累計金額（以「分」為單位儲存，避免增減時累積浮點誤差）"""
+    year: str
+    period: int
+    entries: int = 0
+    taxable_entries: int = 0
+    invoice_entries: int = 0
+    sales_cents: int = 0
+    fees_cents: int = 0
+    taxable_sales_cents: int = 0
+    taxable_fees_cents: int = 0
+    invoice_sales_cents: int = 0
+    invoice_fees_cents: int = 0
+
+    @property
+    def label(self) -> str:
+        """期別名稱"""
+        return period_label(self.year, self.period)
+
+    @property
+    def total_sales(self) -> float:
+        """銷售總額"""
+        return self.sales_cents / 100
+
+    @property
+    def total_fees(self) -> float:
+        """平台費用合計"""
+        return self.fees_cents / 100
+
+    @property
+    def taxable_sales(self) -> float:
+        """應稅銷售額（含稅）"""
+        return self.taxable_sales_cents / 100
+
+    @property
+    def taxable_fees(self) -> float:
+        """應稅銷售的平台費用"""
+        return self.taxable_fees_cents / 100
+
+    @property
+    def exempt_sales(self) -> float:
+        """免稅銷售額"""
+        return (self.sales_cents - self.taxable_sales_cents) / 100
+
+    @property
+    def invoice_sales(self) -> float:
+        """需開發票的銷售額"""
+        return self.invoice_sales_cents / 100
+
+    @property
+    def invoice_fees(self) -> float:
+        """需開發票銷售的平台費用"""
+        return self.invoice_fees_cents / 100
+
+    @property
+    def taxable_net_sales(self) -> float:
+        """應稅銷售額（未稅）"""
+        return round(self.taxable_sales / (1 + TAX_RATE))
+
+    @property
+    def output_tax(self) -> float:
+        """銷項稅額"""
+        return round(self.taxable_sales - self.taxable_net_sales, 2)
+
+    @property
+    def is_empty(self) -> bool:
+        """期別內是否沒有任何項目"""
+        return self.entries == 0
+
+    def apply(self, entry: AccountingEntry, sign: int) -> None:
+        """加入（sign=1）或扣除（sign=-1）一筆記帳項目"""
+        sales = _cents(entry.total_sales) * sign
+        fees = _cents(entry.platform_fee) * sign
+        self.entries += sign
+        self.sales_cents += sales
+        self.fees_cents += fees
+        if entry.taxable:
+            self.taxable_entries += sign
+            self.taxable_sales_cents += sales
+            self.taxable_fees_cents += fees
+        if entry.invoice_required:
+            self.invoice_entries += sign
+            self.invoice_sales_cents += sales
+            self.invoice_fees_cents += fees
+
+
+class TaxLedger:
+    """依雙月申報期別累計應稅及需開發票的銷售額與手續費，隨帳本變更即時更新"""
+
+    def __init__(self):
+        """初始化空白的期別累計"""
+        self.buckets: Dict[Tuple[str, int], PeriodTotals] = {}
+        # 月份無效、無法歸入任何期別的筆數
+        self.skipped = 0
+        self._handler: Optional[ExcelHandler] = None
+
+    def add(self, entry: AccountingEntry) -> None:
+        """加入一筆記帳項目，月份無效時只計入略過筆數"""
+        period = period_of(entry.month)
+        if period is None:
+            self.skipped += 1
+            return
+        key = (entry.year, period)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = PeriodTotals(*key)
+        bucket.apply(entry, 1)
+
+    def remove(self, entry: AccountingEntry) -> None:
+        """扣除一筆記帳項目"""
+        period = period_of(entry.month)
+        if period is None:
+            self.skipped = max(self.skipped - 1, 0)
+            return
+        key = (entry.year, period)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return
+        bucket.apply(entry, -1)
+        if bucket.is_empty:
+            del self.buckets[key]
+
+    def build(self, entries: Iterable[AccountingEntry]) -> 'TaxLedger':
+        """一次掃描建立所有期別的累計金額"""
+        self.buckets.clear()
+        self.skipped = 0
+        for entry in entries:
+            self.add(entry)
+        return self
+
+    def attach(self, handler: ExcelHandler) -> 'TaxLedger':
+        """從處理器建立累計金額，並在帳本變更時自動更新"""
+        self.detach()
+        self._handler = handler
+        self.build(entry for _, entry in handler.iter_indexed_entries())
+        handler.add_listener(self._on_change)
+        return self
+
+    def detach(self) -> None:
+        """停止接收帳本變更"""
+        if self._handler:
+            self._handler.remove_listener(self._on_change)
+            self._handler = None
+
+    def period(self, year: str, period: int) -> PeriodTotals:
+        """取得指定期別的累計金額"""
+        return self.buckets.get((str(year), period)) or PeriodTotals(str(year), period)
+
+    def periods(self) -> List[PeriodTotals]:
+        """所有期別，依時間排序"""
+        return [self.buckets[key] for key in sorted(self.buckets)]
+
+    def write_filing_sheet(self, workbook: Workbook, year: str, period: int) -> Worksheet:
+        """在活頁簿中新增指定期別的申報工作表"""
+        totals = self.period(year, period)
+        worksheet = workbook.create_sheet(title=f"{year}-{period * 2 - 1:02d}-{period * 2:02d}")
+        worksheet.append(['申報期間', totals.label])
+        worksheet.append([])
+        worksheet.append(['項目', '筆數', '銷售額', '平台費用'])
+        worksheet.append(['應稅銷售', totals.taxable_entries, totals.taxable_sales, totals.taxable_fees])
+        worksheet.append(['免稅銷售', totals.entries - totals.taxable_entries, totals.exempt_sales,
+                          totals.total_fees - totals.taxable_fees])
+        worksheet.append(['需開發票', totals.invoice_entries, totals.invoice_sales, totals.invoice_fees])
+        worksheet.append(['合計', totals.entries, totals.total_sales, totals.total_fees])
+        worksheet.append([])
+        worksheet.append(['應稅銷售額（未稅）', totals.taxable_net_sales])
+        worksheet.append([f'銷項稅額（{TAX_RATE:.0%}）', totals.output_tax])
+        return worksheet
+
+    def export_filing_workbook(self, file_path: str,
+                               periods: Optional[Iterable[Tuple[str, int]]] = None) -> bool:
+        """
+        將申報工作表輸出為獨立的 Excel 檔案
+        Args:
+            file_path: 輸出檔案路徑
+            periods: (年份, 期別) 清單，未指定時輸出所有期別
+        """
+        try:
+            workbook = Workbook()
+            workbook.remove(workbook.active)
+            keys = list(periods) if periods is not None else sorted(self.buckets)
+            if not keys:
+                workbook.create_sheet(title='申報彙總')
+            for year, period in keys:
+                self.write_filing_sheet(workbook, year, period)
+
+            directory = os.path.dirname(os.path.abspath(file_path))
+            fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=directory)
+            os.close(fd)
+            try:
+                workbook.save(temp_path)
+                replace_file(temp_path, file_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            return True
+        except Exception as e:
+            print(f"輸出申報工作表時發生錯誤: {e}")
+            return False
+
+    def _on_change(self, kind: str, row_index: int,
+                   before: Optional[AccountingEntry], after: Optional[AccountingEntry]) -> None:
+        """處理帳本變更通知"""
+        if kind == 'reload':
+            self.build(entry for _, entry in self._handler.iter_indexed_entries())
+            return
+        if before is not None:
+            self.remove(before)
+        if after is not None:
+            self.add(after)
@@ -0,0 +1,216 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..models import AccountingEntry
+from ..handlers import ExcelHandler
+from ..handlers.excel_handler import iter_ledger_entries
+from ..handlers.ledger_schema import FIELDS
+
+
+# 預設以訂單日期時間、平台與商品名稱識別同一筆記帳項目
+IDENTITY_FIELDS = ('year', 'month', 'day', 'time', 'platform', 'product_name')
+
+# 金額以「分」為單位比較，避免浮點誤差
+_AMOUNT_FIELDS = ('total_sales', 'platform_fee', 'actual_income')
+
+
+def _normalize(entry: AccountingEntry, name: str) -> Any:
+    """取得用於比較的欄位值"""
+    value = getattr(entry, name)
+    if name in _AMOUNT_FIELDS:
+        return int(round(float(value) * 100))
+    if name in ('month', 'day'):
+        return str(value).zfill(2)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def content_hash(entry: AccountingEntry) -> str:
+    """計算記帳項目所有欄位的內容雜湊"""
+    text = '\x1f'.join(repr(_normalize(entry, name)) for name in FIELDS)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+@dataclass
+class FieldChange:
+    """單一欄位的變更"""
+    field: str
+    old: Any
+    new: Any
+
+
+@dataclass
+class RowChange:
+    """一筆記帳項目的變更"""
+    kind: str  # 'inserted'、'deleted' 或 'modified'
+    base_row: Optional[int]
+    other_row: Optional[int]
+    before: Optional[AccountingEntry]
+    after: Optional[AccountingEntry]
+    changes: List[FieldChange] = field(default_factory=list)
+
+
+@dataclass
+class WorkbookDiff:
+    """兩個帳本版本之間的差異"""
+    inserted: List[RowChange] = field(default_factory=list)
+    deleted: List[RowChange] = field(default_factory=list)
+    modified: List[RowChange] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        """兩個版本是否相同"""
+        return not (self.inserted or self.deleted or self.modified)
+
+    def summary(self) -> Dict[str, int]:
+        """取得各類變更的筆數"""
+        return {
+            'inserted': len(self.inserted),
+            'deleted': len(self.deleted),
+            'modified': len(self.modified),
+            'unchanged': self.unchanged
+        }
+
+
+@dataclass
+class MergeResult:
+    """合併結果"""
+    applied: int = 0
+    skipped: int = 0
+    conflicts: List[Tuple[RowChange, str]] = field(default_factory=list)
+
+
+def field_changes(before: AccountingEntry, after: AccountingEntry) -> List[FieldChange]:
+    """列出兩筆記帳項目之間不同的欄位"""
+    return [
+        FieldChange(name, getattr(before, name), getattr(after, name))
+        for name in FIELDS
+        if _normalize(before, name) != _normalize(after, name)
+    ]
+
+
+def diff_entries(base: Iterable[Tuple[int, AccountingEntry]],
+                 other: Iterable[Tuple[int, AccountingEntry]],
+                 key_fields: Optional[Sequence[str]] = IDENTITY_FIELDS) -> WorkbookDiff:
+    """
+    比對兩組記帳項目
+    Args:
+        base: 原始版本的 (列索引, 記帳項目)
+        other: 修改後版本的 (列索引, 記帳項目)
+        key_fields: 識別同一筆項目的欄位；None 表示只依內容比對（不會產生修改）
+    """
+    def key_of(entry: AccountingEntry, digest: str) -> Tuple[Any, ...]:
+        if key_fields is None:
+            return (digest,)
+        return tuple(_normalize(entry, name) for name in key_fields)
+
+    # 以識別鍵建立原始版本的索引，相同鍵的項目依出現順序排列
+    index: Dict[Tuple[Any, ...], List[Tuple[int, str, AccountingEntry]]] = {}
+    for row_index, entry in base:
+        digest = content_hash(entry)
+        index.setdefault(key_of(entry, digest), []).append((row_index, digest, entry))
+
+    result = WorkbookDiff()
+    for row_index, entry in other:
+        digest = content_hash(entry)
+        bucket = index.get(key_of(entry, digest))
+        if not bucket:
+            result.inserted.append(RowChange('inserted', None, row_index, None, entry))
+            continue
+
+        # 優先配對內容完全相同的項目
+        position = next((i for i, item in enumerate(bucket) if item[1] == digest), None)
+        if position is not None:
+            bucket.pop(position)
+            result.unchanged += 1
+            continue
+
+        base_row, _, before = bucket.pop(0)
+        result.modified.append(RowChange(
+            'modified', base_row, row_index, before, entry, field_changes(before, entry)
+        ))
+
+    for bucket in index.values():
+        for base_row, _, before in bucket:
+            result.deleted.append(RowChange('deleted', base_row, None, before, None))
+    result.deleted.sort(key=lambda change: change.base_row)
+    return result
+
+
+def diff_workbooks(base_path: str, other_path: str,
+                   key_fields: Optional[Sequence[str]] = IDENTITY_FIELDS) -> WorkbookDiff:
+    """以串流方式讀取兩個帳本檔案並比對"""
+    return diff_entries(
+        iter_ledger_entries(base_path),
+        iter_ledger_entries(other_path),
+        key_fields
+    )
+
+
+def merge_diff(handler: ExcelHandler, diff: WorkbookDiff,
+               key_fields: Sequence[str] = IDENTITY_FIELDS) -> MergeResult:
+    """
+    三方合併：將「原始版本 → 修改版本」的差異套用到目前的主帳本
+    主帳本中已不同於原始版本的項目視為衝突，不會被覆寫
+    Args:
+        handler: 已載入主帳本的 Excel 處理器（呼叫端負責儲存）
+        diff: diff_workbooks(原始版本, 修改版本) 的結果
+        key_fields: 識別同一筆項目的欄位
+    """
+    result = MergeResult()
+
+    # 依內容雜湊與識別鍵建立主帳本的索引
+    by_hash: Dict[str, List[int]] = {}
+    by_key: Dict[Tuple[Any, ...], int] = {}
+    for row_index, entry in handler.iter_indexed_entries():
+        by_hash.setdefault(content_hash(entry), []).append(row_index)
+        by_key[tuple(_normalize(entry, name) for name in key_fields)] = row_index
+
+    def take(entry: AccountingEntry) -> Optional[int]:
+        rows = by_hash.get(content_hash(entry))
+        return rows.pop(0) if rows else None
+
+    def key_exists(entry: AccountingEntry) -> bool:
+        return tuple(_normalize(entry, name) for name in key_fields) in by_key
+
+    # 先更新（不影響列索引），再由下而上刪除，最後新增
+    for change in diff.modified:
+        row_index = take(change.before)
+        if row_index is not None:
+            if handler.update_entry(row_index, change.after):
+                by_hash.setdefault(content_hash(change.after), []).append(row_index)
+                result.applied += 1
+            else:
+                result.conflicts.append((change, "無法更新主帳本"))
+        elif take(change.after) is not None:
+            result.skipped += 1
+        else:
+            result.conflicts.append((change, "主帳本中的項目已被修改或刪除"))
+
+    deletions = []
+    for change in diff.deleted:
+        row_index = take(change.before)
+        if row_index is not None:
+            deletions.append((row_index, change))
+        elif key_exists(change.before):
+            result.conflicts.append((change, "主帳本中的項目已被修改"))
+        else:
+            result.skipped += 1
+    for row_index, change in sorted(deletions, key=lambda item: item[0], reverse=True):
+        if handler.delete_entry(row_index):
+            result.applied += 1
+        else:
+            result.conflicts.append((change, "無法刪除主帳本中的項目"))
+
+    for change in diff.inserted:
+        if take(change.after) is not None:
+            result.skipped += 1
+        elif handler.add_entry(change.after):
+            result.applied += 1
+        else:
+            result.conflicts.append((change, "無法新增至主帳本"))
+
+    return result
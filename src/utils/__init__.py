@@ -3,13 +3,18 @@ from .validators import (
     validate_string,
     validate_number,
     validate_boolean,
-    validate_platform_fee
+    validate_platform_fee,
+    parse_month
 )
+from .memory_budget import MemoryBudget, MemoryBudgetExceeded
 
 __all__ = [
     'validate_date',
     'validate_string',
     'validate_number',
     'validate_boolean',
-    'validate_platform_fee'
+    'validate_platform_fee',
+    'parse_month',
+    'MemoryBudget',
+    'MemoryBudgetExceeded'
 ]
\ No newline at end of file
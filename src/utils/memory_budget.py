@@ -0,0 +1,125 @@
+import os
+import tracemalloc
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+MB = 1024 * 1024
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """操作的記憶體用量超過預算"""
+
+
+class MemoryGuard:
+    """以 tracemalloc 追蹤單一操作的記憶體用量，超過上限時立即中止"""
+
+    def __init__(self, budget: 'MemoryBudget', operation: str):
+        """
+        初始化記憶體監控
+        Args:
+            budget: 所屬的記憶體預算設定
+            operation: 操作名稱，用於錯誤訊息與統計
+        """
+        self.budget = budget
+        self.operation = operation
+        self.peak_bytes = 0
+        self._baseline = 0
+        self._started = False
+        self._exact_peak = False
+
+    def __enter__(self) -> 'MemoryGuard':
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        # 由本監控啟動追蹤，或有 reset_peak()（Python 3.9+）時可取得準確的峰值；
+        # 否則外部已啟動的追蹤峰值可能早於本操作，只能以目前用量取樣
+        self._exact_peak = self._started or hasattr(tracemalloc, 'reset_peak')
+        if self._exact_peak and not self._started:
+            tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._update_peak()
+        if self._started:
+            tracemalloc.stop()
+        self.budget.peaks[self.operation] = self.peak_bytes
+
+    def check(self) -> None:
+        """
+        檢查目前的記憶體用量
+        Raises:
+            MemoryBudgetExceeded: 用量超過預算
+        """
+        self._update_peak()
+        if self.peak_bytes > self.budget.limit_bytes:
+            raise MemoryBudgetExceeded(
+                f"{self.operation} 使用 {self.peak_bytes / MB:.1f} MB 記憶體，"
+                f"超過預算 {self.budget.limit_bytes / MB:.1f} MB，已中止操作"
+            )
+
+    def track(self, iterable: Iterable[T]) -> Iterator[T]:
+        """逐項傳回資料，每隔固定筆數檢查一次記憶體用量"""
+        interval = self.budget.check_interval
+        for count, item in enumerate(iterable, start=1):
+            if count % interval == 0:
+                self.check()
+            yield item
+
+    def _update_peak(self) -> None:
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            used = (peak if self._exact_peak else current) - self._baseline
+            self.peak_bytes = max(self.peak_bytes, used)
+
+
+class MemoryBudget:
+    """記憶體預算設定：大檔案改用分塊唯讀處理，並監控各操作的記憶體峰值"""
+
+    # xlsx 為壓縮格式，完整載入時的記憶體用量約為檔案大小的倍數
+    LOAD_EXPANSION_FACTOR = 50
+
+    def __init__(self, limit_bytes: int = 256 * MB, large_file_bytes: int = 2 * MB,
+                 chunk_size: int = 500, check_interval: int = 1000):
+        """
+        初始化記憶體預算
+        Args:
+            limit_bytes: 單一操作允許的記憶體峰值
+            large_file_bytes: 檔案超過此大小時改用分塊唯讀處理
+            chunk_size: 分塊處理時每塊的筆數
+            check_interval: 每處理幾筆檢查一次記憶體用量
+        """
+        self.limit_bytes = limit_bytes
+        self.large_file_bytes = large_file_bytes
+        self.chunk_size = chunk_size
+        self.check_interval = check_interval
+        # 各操作最近一次的記憶體峰值
+        self.peaks: Dict[str, int] = {}
+
+    def is_large(self, file_path: str) -> bool:
+        """檔案是否超過大小門檻"""
+        try:
+            return os.path.getsize(file_path) > self.large_file_bytes
+        except OSError:
+            return False
+
+    def estimate_load_bytes(self, file_path: str) -> int:
+        """估計完整載入檔案所需的記憶體"""
+        try:
+            return os.path.getsize(file_path) * self.LOAD_EXPANSION_FACTOR
+        except OSError:
+            return 0
+
+    def guard(self, operation: str) -> MemoryGuard:
+        """建立指定操作的記憶體監控"""
+        return MemoryGuard(self, operation)
+
+    def report(self) -> Dict[str, float]:
+        """各操作的記憶體峰值（MB）"""
+        return {operation: peak / MB for operation, peak in self.peaks.items()}
+
+
+def guarded(iterable: Iterable[T], guard: Optional[MemoryGuard]) -> Iterable[T]:
+    """有監控時逐項檢查記憶體用量，否則原樣返回"""
+    return guard.track(iterable) if guard else iterable
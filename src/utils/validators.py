@@ -34,4 +34,13 @@ def validate_platform_fee(fee: Union[int, float], total_sales: Union[int, float]
     """驗證平台手續費是否合理（不能大於銷售總額）"""
     if not validate_number(fee, 0) or not validate_number(total_sales, 0):
         return False
-    return fee <= total_sales
\ No newline at end of file
+    return fee <= total_sales
+
+
+def parse_month(month: Any) -> Optional[int]:
+    """解析月份，不是 1 到 12 的數字時返回 None"""
+    try:
+        value = int(str(month).strip())
+    except (TypeError, ValueError):
+        return None
+    return value if 1 <= value <= 12 else None
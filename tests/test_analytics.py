@@ -0,0 +1,123 @@
+import unittest
+import os
+import random
+from openpyxl import Workbook
+
+from src.models import AccountingEntry
+from src.services import QuantileSketch, TopN, analyze_entries, analyze_file
+
+
+def _entry(month, platform, product, sales, fee=0.0):
+    return AccountingEntry(
+        year="2025", month=month, day="01", time="10:00:00",
+        platform=platform, product_name=product, order_quantity=1,
+        total_sales=sales, platform_fee=fee
+    )
+
+
+class TestAnalytics(unittest.TestCase):
+    """統計分析模組的單元測試"""
+
+    def test_top_n(self):
+        """測試固定大小的排名"""
+        top = TopN(3)
+        for value in [5, 1, 9, 7, 3, 8]:
+            top.push(value, f"item{value}")
+        self.assertEqual(top.items(), [("item9", 9), ("item8", 8), ("item7", 7)])
+
+        other = TopN(3)
+        other.push(10, "item10")
+        top.merge(other)
+        self.assertEqual([item for item, _ in top.items()], ["item10", "item9", "item8"])
+
+    def test_quantile_sketch_accuracy(self):
+        """測試分位數的相對誤差"""
+        rng = random.Random(0)
+        values = [rng.uniform(1, 10000) for _ in range(5000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        ordered = sorted(values)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * 0.02)
+        self.assertEqual(sketch.quantile(0), min(values))
+        self.assertEqual(sketch.quantile(1), max(values))
+
+    def test_quantile_sketch_merge(self):
+        """測試合併分位數摘要"""
+        left, right, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in range(1, 1001):
+            (left if value % 2 else right).add(value)
+            whole.add(value)
+        left.merge(right)
+        self.assertEqual(left.count, 1000)
+        self.assertEqual(left.quantile(0.5), whole.quantile(0.5))
+
+        with self.assertRaises(ValueError):
+            left.merge(QuantileSketch(relative_accuracy=0.05))
+
+    def test_ledger_analytics(self):
+        """測試商品排名、平台中位數與季度篩選"""
+        entries = [
+            _entry("01", "蝦皮", "商品A", 100.0, 10.0),
+            _entry("02", "蝦皮", "商品B", 300.0, 30.0),
+            _entry("03", "蝦皮", "商品A", 200.0, 20.0),
+            _entry("03", "露天", "商品C", 50.0, 5.0),
+            _entry("07", "露天", "商品D", 999.0)
+        ]
+        analytics = analyze_entries(entries, year="2025", quarter=1, top_orders=2)
+        self.assertEqual(analytics.entries, 4)
+        self.assertEqual(analytics.top_products(2), [("商品A", 270.0), ("商品B", 270.0)])
+        self.assertAlmostEqual(analytics.platform_quantile("蝦皮", 0.5), 200.0, delta=4.0)
+        self.assertEqual([e.product_name for e, _ in analytics.top_orders.items()],
+                         ["商品B", "商品A"])
+
+        # 分段統計後合併應與一次統計相同
+        merged = analyze_entries(entries[:2], quarter=1).merge(
+            analyze_entries(entries[2:], quarter=1)
+        )
+        self.assertEqual(merged.product_income, analytics.product_income)
+        self.assertEqual(merged.platform_medians(), analytics.platform_medians())
+
+    def test_invalid_month_skipped(self):
+        """測試指定季度時略過月份無效的項目"""
+        entries = [
+            _entry("01", "蝦皮", "商品A", 100.0),
+            _entry("Aug", "蝦皮", "商品B", 200.0),
+            _entry("13", "蝦皮", "商品C", 300.0)
+        ]
+        analytics = analyze_entries(entries, quarter=1)
+        self.assertEqual(analytics.entries, 1)
+        self.assertEqual(analytics.summary()['skipped'], 2)
+
+        # 不篩選季度時不需要月份
+        self.assertEqual(analyze_entries(entries).entries, 3)
+
+    def test_analyze_file(self):
+        """測試串流統計帳本檔案"""
+        test_file = "test_analytics.xlsx"
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '平台費用', '實收金額',
+            '需要發票', '應稅'
+        ])
+        for i in range(1, 11):
+            ws.append(["2025", "08", "01", "10:00:00", "蝦皮", f"商品{i % 3}",
+                       1, float(i * 10), 1.0, float(i * 10 - 1), False, True])
+        wb.save(test_file)
+        try:
+            analytics = analyze_file(test_file)
+            self.assertEqual(analytics.entries, 10)
+            self.assertEqual(analytics.top_products(1)[0][0], "商品1")
+            self.assertEqual(analytics.summary()['platforms'], ["蝦皮"])
+        finally:
+            os.remove(test_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
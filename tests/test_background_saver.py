@@ -0,0 +1,119 @@
+import unittest
+import os
+import time
+from openpyxl import Workbook
+
+from src.models import AccountingEntry
+from src.handlers import ExcelHandler, BackgroundSaver
+
+
+class TestBackgroundSaver(unittest.TestCase):
+    """BackgroundSaver 類別的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.test_file = "test_background_saver.xlsx"
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '平台費用', '實收金額',
+            '需要發票', '應稅'
+        ])
+        wb.save(self.test_file)
+
+        self.handler = ExcelHandler(self.test_file)
+        self.handler.load_workbook()
+        self.test_entry = AccountingEntry(
+            year="2025",
+            month="08",
+            day="19",
+            time="14:30:00",
+            platform="蝦皮",
+            product_name="測試商品",
+            order_quantity=1,
+            total_sales=100.0,
+            platform_fee=10.0
+        )
+
+    def tearDown(self):
+        """清理測試環境"""
+        if os.path.exists(self.test_file):
+            os.remove(self.test_file)
+
+    def test_coalesce_rapid_edits(self):
+        """測試連續變更合併成一次儲存"""
+        saver = BackgroundSaver(self.handler, quiet_period=0.2)
+        saver.start()
+        for _ in range(5):
+            self.handler.add_entry(self.test_entry)
+            saver.request_save()
+
+        deadline = time.monotonic() + 5
+        while saver.saves == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        saver.stop()
+
+        stats = saver.stats()
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['saves'], 1)
+        self.assertEqual(stats['coalesced'], 4)
+        self.assertGreater(stats['last_latency'], 0.0)
+        self.assertFalse(self.handler.is_dirty)
+
+        reloaded = ExcelHandler(self.test_file)
+        reloaded.load_workbook()
+        self.assertEqual(len(reloaded.read_entries()), 5)
+
+    def test_stop_flushes_pending(self):
+        """測試結束時寫入尚未儲存的變更"""
+        saver = BackgroundSaver(self.handler, quiet_period=60)
+        saver.start()
+        self.handler.add_entry(self.test_entry)
+        saver.request_save()
+        self.assertTrue(saver.stop())
+        self.assertEqual(saver.saves, 1)
+
+        reloaded = ExcelHandler(self.test_file)
+        reloaded.load_workbook()
+        self.assertEqual(len(reloaded.read_entries()), 1)
+
+    def test_failed_save_backs_off(self):
+        """測試儲存失敗時以指數退避重試，超過次數後停止並回報錯誤"""
+        def locked():
+            raise PermissionError("檔案已被其他程式開啟")
+        self.handler._atomic_save = locked
+
+        saver = BackgroundSaver(self.handler, quiet_period=0.05, max_retries=2)
+        saver.start()
+        self.handler.add_entry(self.test_entry)
+        saver.request_save()
+        time.sleep(1.0)
+
+        # 第一次失敗加上兩次重試後停止
+        self.assertEqual(saver.failures, 3)
+        self.assertTrue(saver.has_failed)
+        self.assertIn("其他程式", saver.pop_error())
+        self.assertIsNone(saver.pop_error())
+        self.assertTrue(self.handler.is_dirty)
+
+        # 檔案可寫入後，下一次要求儲存即恢復
+        del self.handler._atomic_save
+        saver.request_save()
+        self.assertTrue(saver.stop())
+        self.assertFalse(saver.has_failed)
+        self.assertFalse(self.handler.is_dirty)
+        self.assertEqual(saver.saves, 1)
+
+    def test_stop_without_changes(self):
+        """測試沒有變更時不寫檔"""
+        saver = BackgroundSaver(self.handler)
+        saver.start()
+        self.assertTrue(saver.stop())
+        self.assertEqual(saver.saves, 0)
+        self.assertEqual(self.handler.save_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
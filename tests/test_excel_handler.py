@@ -51,6 +51,37 @@ class TestExcelHandler(unittest.TestCase):
         self.assertIsNotNone(self.handler.workbook)
         self.assertIsNotNone(self.handler.worksheet)
 
+    def test_missing_header_refused(self):
+        """測試標題列缺少必要欄位時拒絕載入，且不修改檔案"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '手續費', '實收金額',
+            '需要發票', '應稅'
+        ])
+        ws.append(["2025", "08", "19", "14:30:00", "蝦皮", "商品", 1, 100.0, 10.0, 90.0, False, True])
+        wb.save(self.test_file)
+        before = os.path.getmtime(self.test_file), os.path.getsize(self.test_file)
+
+        self.assertFalse(self.handler.load_workbook())
+        self.assertIsNone(self.handler.worksheet)
+        self.assertFalse(self.handler.is_dirty)
+        self.assertFalse(self.handler.save_workbook(force=True))
+        self.assertFalse(self.handler.add_entry(self.test_entry))
+        self.assertEqual((os.path.getmtime(self.test_file), os.path.getsize(self.test_file)), before)
+
+    def test_blank_sheet_gets_headers(self):
+        """測試空白工作表載入時加入標題列"""
+        Workbook().save(self.test_file)
+        self.assertTrue(self.handler.load_workbook())
+        self.assertTrue(self.handler.is_dirty)
+        self.assertTrue(self.handler.add_entry(self.test_entry))
+        rows = list(self.handler.worksheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:2], ('年份', '月份'))
+        self.assertEqual(len(rows), 2)
+
     def test_add_and_read_entry(self):
         """測試新增和讀取記帳項目"""
         self.handler.load_workbook()
@@ -139,6 +170,122 @@ class TestExcelHandler(unittest.TestCase):
         entry = self.handler.get_entry_by_index(999)
         self.assertIsNone(entry)
 
+    def test_dirty_tracking(self):
+        """測試變更追蹤與略過無變更的儲存"""
+        self.handler.load_workbook()
+        self.assertFalse(self.handler.is_dirty)
+
+        # 沒有變更時不寫檔
+        self.assertTrue(self.handler.save_workbook())
+        self.assertEqual(self.handler.save_count, 0)
+
+        self.handler.add_entry(self.test_entry)
+        self.assertTrue(self.handler.is_dirty)
+        self.assertTrue(self.handler.save_workbook())
+        self.assertFalse(self.handler.is_dirty)
+        self.assertEqual(self.handler.save_count, 1)
+
+        # 強制儲存
+        self.assertTrue(self.handler.save_workbook(force=True))
+        self.assertEqual(self.handler.save_count, 2)
+
+        # 儲存後不應留下暫存檔
+        directory = os.path.dirname(os.path.abspath(self.test_file))
+        leftovers = [name for name in os.listdir(directory)
+                     if name.startswith('tmp') and name.endswith('.xlsx')]
+        self.assertEqual(leftovers, [])
+
+    def test_entry_cache(self):
+        """測試記帳項目快取與失效"""
+        self.handler.load_workbook()
+        for name in ("商品1", "商品2", "商品3"):
+            self.test_entry.product_name = name
+            self.handler.add_entry(self.test_entry)
+
+        self.assertEqual(self.handler.get_entry_by_index(3).product_name, "商品2")
+        self.assertEqual(self.handler.get_entry_by_index(3).product_name, "商品2")
+        self.assertEqual(self.handler.cache_info()['hits'], 1)
+        self.assertEqual(self.handler.cache_info()['misses'], 1)
+
+        # 更新後快取失效
+        self.test_entry.product_name = "更新商品"
+        self.handler.update_entry(3, self.test_entry)
+        self.assertEqual(self.handler.get_entry_by_index(3).product_name, "更新商品")
+
+        # 刪除後，後續列的快取位移
+        self.handler.get_entry_by_index(4)
+        self.handler.delete_entry(2)
+        self.assertEqual(self.handler.get_entry_by_index(2).product_name, "更新商品")
+        self.assertEqual(self.handler.get_entry_by_index(3).product_name, "商品3")
+        self.assertEqual(self.handler.cache_info()['hits'], 3)
+
+        # 新增至已快取的位置時快取失效
+        self.handler.delete_entry(3)
+        self.assertIsNone(self.handler.get_entry_by_index(3))
+        self.test_entry.product_name = "新商品"
+        self.handler.add_entry(self.test_entry)
+        self.assertEqual(self.handler.get_entry_by_index(3).product_name, "新商品")
+
+    def test_entry_cache_size(self):
+        """測試快取大小上限"""
+        handler = ExcelHandler(self.test_file, cache_size=2)
+        handler.load_workbook()
+        for _ in range(3):
+            handler.add_entry(self.test_entry)
+        for row_index in (2, 3, 4):
+            handler.get_entry_by_index(row_index)
+        self.assertEqual(handler.cache_info()['size'], 2)
+
+        # 最久未使用的第 2 列已被移除
+        handler.get_entry_by_index(2)
+        self.assertEqual(handler.cache_info()['hits'], 0)
+        self.assertEqual(handler.cache_info()['misses'], 4)
+
+    def test_listener_error_does_not_fail_change(self):
+        """測試變更通知的接收者出錯時，變更仍視為成功並通知其他接收者"""
+        self.handler.load_workbook()
+        events = []
+
+        def broken(kind, row_index, before, after):
+            raise ValueError("接收者錯誤")
+
+        self.handler.add_listener(broken)
+        self.handler.add_listener(lambda kind, row_index, before, after: events.append((kind, row_index)))
+        self.assertTrue(self.handler.add_entry(self.test_entry))
+        self.assertTrue(self.handler.is_dirty)
+        self.assertEqual(events, [('add', 2)])
+
+    def test_reordered_columns(self):
+        """測試欄位重新排序與額外欄位"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '平台', '備註', '年份', '月份', '日期', '時間',
+            '商品名稱', '訂單數量', '銷售總額', '平台費用',
+            '實收金額', '需要發票', '應稅'
+        ])
+        ws.append(['露天', '保留', '2025', '08', '19', '14:30:00',
+                   '舊商品', 1, 50.0, 5.0, 45.0, False, True])
+        wb.save(self.test_file)
+
+        self.handler.load_workbook()
+        entries = self.handler.read_entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].platform, '露天')
+        self.assertEqual(entries[0].actual_income, 45.0)
+
+        # 新增與更新依標題寫入正確欄位，並保留額外欄位
+        self.handler.add_entry(self.test_entry)
+        self.test_entry.product_name = '更新商品'
+        self.handler.update_entry(2, self.test_entry)
+        self.assertEqual(self.handler.worksheet.cell(row=2, column=2).value, '保留')
+        self.assertEqual(self.handler.worksheet.cell(row=3, column=1).value, '蝦皮')
+
+        self.assertEqual(self.handler.read_fields(['平台', '實收金額']), [
+            {'platform': '蝦皮', 'actual_income': 90.0},
+            {'platform': '蝦皮', 'actual_income': 90.0}
+        ])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import unittest
+import os
+import tracemalloc
+from openpyxl import Workbook, load_workbook
+
+from src.models import AccountingEntry
+from src.handlers import ExcelHandler, compact_ledger, write_entries_fast
+
+
+HEADERS = [
+    '年份', '月份', '日期', '時間',
+    '平台', '商品名稱', '訂單數量',
+    '銷售總額', '平台費用', '實收金額',
+    '需要發票', '應稅'
+]
+
+
+def _entries(count):
+    for i in range(count):
+        yield AccountingEntry(
+            year="2025", month="08", day="19", time="14:30:00",
+            platform="蝦皮", product_name=f"商品{i}", order_quantity=1,
+            total_sales=100.0 + i, platform_fee=10.0
+        )
+
+
+class TestFastWriter(unittest.TestCase):
+    """唯寫模式快速寫出的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.test_file = "test_fast_writer.xlsx"
+
+    def tearDown(self):
+        """清理測試環境"""
+        if os.path.exists(self.test_file):
+            os.remove(self.test_file)
+
+    def test_write_entries(self):
+        """測試寫出與讀回記帳項目"""
+        progress = []
+        written = write_entries_fast(self.test_file, _entries(25), batch_size=10,
+                                     progress=progress.append)
+        self.assertEqual(written, 25)
+        self.assertEqual(progress, [10, 20, 25])
+
+        handler = ExcelHandler(self.test_file)
+        self.assertTrue(handler.load_workbook())
+        self.assertFalse(handler.is_dirty)
+        self.assertEqual([c.value for c in handler.worksheet[1]], HEADERS)
+        entries = handler.read_entries()
+        self.assertEqual(len(entries), 25)
+        self.assertEqual(entries[-1].product_name, "商品24")
+        self.assertEqual(entries[-1].actual_income, 114.0)
+
+    def test_create_empty_ledger(self):
+        """測試建立只有標題列的新檔案"""
+        self.assertEqual(write_entries_fast(self.test_file, []), 0)
+        rows = list(load_workbook(self.test_file).active.iter_rows(values_only=True))
+        self.assertEqual(rows, [tuple(HEADERS)])
+
+    def test_compact_ledger(self):
+        """測試壓縮帳本"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(['備註'] + HEADERS)
+        ws.append(['x', "2025", "08", "19", "14:30:00", "蝦皮", "商品A", 1, 100.0, 10.0, 90.0, False, True])
+        ws.append([None] * 13)
+        ws.append(['y', "2025", "08", "19", "14:30:00", "蝦皮", "商品B", 1, 100.0, 500.0, -400.0, False, True])
+        ws.append(['z', "2025", "08", "20", "14:30:00", "露天", "商品C", 2, 200.0, 20.0, 180.0, True, True])
+        wb.save(self.test_file)
+
+        self.assertEqual(compact_ledger(self.test_file), {'kept': 2, 'dropped': 2})
+        rows = list(load_workbook(self.test_file).active.iter_rows(values_only=True))
+        # 保留原本的欄位順序與額外欄位
+        self.assertEqual(rows[0], tuple(['備註'] + HEADERS))
+        self.assertEqual([(row[0], row[6]) for row in rows[1:]], [('x', "商品A"), ('z', "商品C")])
+
+    def test_reordered_headers(self):
+        """測試依指定的標題順序寫出欄位"""
+        headers = ['平台', '備註'] + [h for h in HEADERS if h != '平台']
+        write_entries_fast(self.test_file, _entries(1), headers=headers)
+
+        rows = list(load_workbook(self.test_file).active.iter_rows(values_only=True))
+        self.assertEqual(rows[0], tuple(headers))
+        self.assertEqual(rows[1][:3], ("蝦皮", None, "2025"))
+
+        handler = ExcelHandler(self.test_file)
+        self.assertTrue(handler.load_workbook())
+        self.assertEqual(handler.read_entries()[0].product_name, "商品0")
+
+        with self.assertRaises(ValueError):
+            write_entries_fast(self.test_file, [], headers=HEADERS[:-1])
+
+    def test_lower_peak_memory(self):
+        """測試唯寫模式的記憶體峰值低於完整活頁簿"""
+        tracemalloc.start()
+        try:
+            write_entries_fast(self.test_file, _entries(2000))
+            fast_peak = tracemalloc.get_traced_memory()[1]
+
+            # 重新開始追蹤以重設峰值
+            tracemalloc.stop()
+            tracemalloc.start()
+            workbook = Workbook()
+            worksheet = workbook.active
+            worksheet.append(HEADERS)
+            for entry in _entries(2000):
+                worksheet.append(list(entry.to_dict().values()))
+            workbook.save(self.test_file)
+            del workbook, worksheet
+            full_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(fast_peak, full_peak / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import os
+from openpyxl import Workbook
+
+from src.models import AccountingEntry
+from src.handlers import ExcelHandler
+from src.services import OperationHistory, TaxLedger
+
+
+def _entry(product, sales=100.0):
+    return AccountingEntry(
+        year="2025", month="08", day="19", time="14:30:00",
+        platform="蝦皮", product_name=product, order_quantity=1,
+        total_sales=sales, platform_fee=10.0
+    )
+
+
+class TestOperationHistory(unittest.TestCase):
+    """OperationHistory 類別的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.test_file = "test_history.xlsx"
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '平台費用', '實收金額',
+            '需要發票', '應稅'
+        ])
+        wb.save(self.test_file)
+
+        self.handler = ExcelHandler(self.test_file)
+        self.handler.load_workbook()
+        for product in ("商品A", "商品B", "商品C"):
+            self.handler.add_entry(_entry(product))
+
+    def tearDown(self):
+        """清理測試環境"""
+        if os.path.exists(self.test_file):
+            os.remove(self.test_file)
+
+    def _products(self):
+        return [entry.product_name for entry in self.handler.read_entries()]
+
+    def test_undo_redo(self):
+        """測試復原與重做新增、修改及刪除"""
+        history = OperationHistory().attach(self.handler)
+        self.handler.add_entry(_entry("商品D"))
+        self.handler.update_entry(2, _entry("商品A2", 150.0))
+        self.handler.delete_entry(3)
+        self.assertEqual(self._products(), ["商品A2", "商品C", "商品D"])
+
+        self.assertEqual(history.undo().kind, 'delete')
+        self.assertEqual(self._products(), ["商品A2", "商品B", "商品C", "商品D"])
+        self.assertEqual(history.undo().kind, 'update')
+        self.assertEqual(self.handler.get_entry_by_index(2).total_sales, 100.0)
+        self.assertEqual(history.undo().kind, 'add')
+        self.assertEqual(self._products(), ["商品A", "商品B", "商品C"])
+        self.assertIsNone(history.undo())
+
+        history.redo()
+        history.redo()
+        history.redo()
+        self.assertEqual(self._products(), ["商品A2", "商品C", "商品D"])
+        self.assertFalse(history.can_redo)
+
+        # 新的變更會清除重做紀錄
+        history.undo()
+        self.handler.add_entry(_entry("商品E"))
+        self.assertFalse(history.can_redo)
+
+    def test_capacity(self):
+        """測試以環狀緩衝區限制紀錄數量"""
+        history = OperationHistory(capacity=2).attach(self.handler)
+        for product in ("商品D", "商品E", "商品F"):
+            self.handler.add_entry(_entry(product))
+        self.assertIsNotNone(history.undo())
+        self.assertIsNotNone(history.undo())
+        self.assertIsNone(history.undo())
+        self.assertEqual(self._products(), ["商品A", "商品B", "商品C", "商品D"])
+
+    def test_unrecoverable_delete_clears_history(self):
+        """測試刪除無法解析的列後清除紀錄，避免以錯誤的列索引復原"""
+        # 商品B 的手續費大於銷售總額，無法通過驗證
+        self.handler.worksheet.cell(row=3, column=self.handler.schema.column('platform_fee'),
+                                    value=500.0)
+        history = OperationHistory().attach(self.handler)
+        self.handler.update_entry(4, _entry("商品C2"))
+        self.assertTrue(history.can_undo)
+
+        self.assertTrue(self.handler.delete_entry(3))
+        self.assertFalse(history.can_undo)
+        self.assertIsNone(history.undo())
+        self.assertEqual(self._products(), ["商品A", "商品C2"])
+
+        # 超出範圍的刪除不會變更工作表，也不影響紀錄
+        self.handler.update_entry(2, _entry("商品A2"))
+        self.assertFalse(self.handler.delete_entry(99))
+        self.assertEqual(history.undo().kind, 'update')
+        self.assertEqual(self._products(), ["商品A", "商品C2"])
+        self.assertFalse(self.handler.insert_entry(2, None))
+
+    def test_undo_keeps_dependents_in_sync(self):
+        """測試復原時快取與其他接收者同步更新"""
+        tax_ledger = TaxLedger().attach(self.handler)
+        history = OperationHistory().attach(self.handler)
+        self.handler.get_entry_by_index(3)
+        self.handler.delete_entry(2)
+        self.assertEqual(tax_ledger.period("2025", 4).entries, 2)
+
+        history.undo()
+        self.assertEqual(tax_ledger.period("2025", 4).entries, 3)
+        self.assertEqual(self.handler.get_entry_by_index(2).product_name, "商品A")
+        self.assertEqual(self.handler.get_entry_by_index(3).product_name, "商品B")
+
+    def test_reload_clears_history(self):
+        """測試重新載入檔案時清除紀錄"""
+        history = OperationHistory().attach(self.handler)
+        self.handler.add_entry(_entry("商品D"))
+        self.handler.load_workbook()
+        self.assertFalse(history.can_undo)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import csv
+import json
+import os
+from openpyxl import Workbook
+
+from src.handlers import LedgerExporter, read_columnar
+
+
+class TestLedgerExporter(unittest.TestCase):
+    """LedgerExporter 類別的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.test_file = "test_exporter.xlsx"
+        self.output_file = "test_exporter_output"
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '平台費用', '實收金額',
+            '需要發票', '應稅'
+        ])
+        for i in range(25):
+            platform = "蝦皮" if i % 2 == 0 else "露天"
+            month = "08" if i < 20 else "09"
+            ws.append(["2025", month, "19", "14:30:00", platform, f"商品{i}",
+                       1, 100.0 + i, 10.0, 90.0 + i, False, True])
+        wb.save(self.test_file)
+        self.exporter = LedgerExporter(self.test_file, batch_size=4)
+
+    def tearDown(self):
+        """清理測試環境"""
+        for path in (self.test_file, self.output_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_export_csv(self):
+        """測試匯出 CSV"""
+        stats = self.exporter.export(self.output_file, 'csv')
+        self.assertEqual(stats['scanned'], 25)
+        self.assertEqual(stats['exported'], 25)
+
+        with open(self.output_file, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[0]['product_name'], "商品0")
+        self.assertEqual(float(rows[0]['actual_income']), 90.0)
+
+    def test_export_jsonl_with_filters(self):
+        """測試匯出 JSON Lines 並套用篩選條件"""
+        stats = self.exporter.export(self.output_file, 'jsonl',
+                                     year="2025", month=8, platform="蝦皮")
+        self.assertEqual(stats['exported'], 10)
+
+        with open(self.output_file, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 10)
+        self.assertTrue(all(row['platform'] == "蝦皮" for row in rows))
+        self.assertTrue(all(row['month'] == "08" for row in rows))
+
+    def test_export_columnar(self):
+        """測試匯出分塊欄式檔案"""
+        self.exporter.export(self.output_file, 'columnar')
+        batches = list(read_columnar(self.output_file))
+        self.assertEqual(len(batches), 7)
+        self.assertEqual(sum(len(batch['year']) for batch in batches), 25)
+        self.assertEqual(batches[0]['product_name'][:2], ["商品0", "商品1"])
+
+    def test_progress_callback(self):
+        """測試進度回報"""
+        progress = []
+        self.exporter.export(self.output_file, 'csv',
+                             progress=lambda scanned, exported: progress.append(exported))
+        self.assertEqual(progress, [4, 8, 12, 16, 20, 24, 25])
+
+    def test_invalid_format(self):
+        """測試不支援的格式"""
+        with self.assertRaises(ValueError):
+            self.exporter.export(self.output_file, 'xml')
+        self.assertFalse(os.path.exists(self.output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from src.models import AccountingEntry
+from src.handlers import LedgerSchema
+
+
+class TestLedgerSchema(unittest.TestCase):
+    """LedgerSchema 類別的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        # 重新排序並加入額外欄位的標題列
+        self.header_row = [
+            '備註', '平台', '年份', '月份', '日期', '時間',
+            '商品名稱', '訂單數量', '銷售總額', '平台費用',
+            '實收金額', '需要發票', '應稅'
+        ]
+        self.row = ('贈品', '蝦皮', '2025', '08', '19', '14:30:00',
+                    '測試商品', 2, 100.0, 10.0, 90.0, True, False)
+
+    def test_from_header_row(self):
+        """測試依標題建立欄位對應"""
+        schema = LedgerSchema.from_header_row(self.header_row)
+        self.assertIsNotNone(schema)
+        self.assertEqual(schema.index('platform'), 1)
+        self.assertEqual(schema.column('實收金額'), 11)
+        self.assertEqual(schema.width, 13)
+
+    def test_missing_header(self):
+        """測試缺少必要欄位"""
+        self.assertIsNone(LedgerSchema.from_header_row(self.header_row[:-1]))
+        self.assertIsNone(LedgerSchema.from_header_row([None]))
+        self.assertEqual(LedgerSchema.missing_headers(self.header_row[:-1]), ['應稅'])
+
+    def test_decode_and_encode(self):
+        """測試轉換記帳項目"""
+        schema = LedgerSchema.from_header_row(self.header_row)
+        entry = schema.decode(self.row)
+        self.assertIsInstance(entry, AccountingEntry)
+        self.assertEqual(entry.platform, '蝦皮')
+        self.assertEqual(entry.order_quantity, 2)
+        self.assertTrue(entry.invoice_required)
+        self.assertFalse(entry.taxable)
+
+        row = schema.encode(entry)
+        self.assertEqual(len(row), 13)
+        self.assertIsNone(row[0])
+        self.assertEqual(tuple(row[1:]), self.row[1:])
+
+    def test_projection(self):
+        """測試只轉換指定欄位"""
+        schema = LedgerSchema.from_header_row(self.header_row)
+        decoders = schema.compile(['平台', 'actual_income'])
+        self.assertIs(decoders, schema.compile(['platform', '實收金額']))
+        self.assertEqual(schema.decode_fields(self.row, decoders),
+                         {'platform': '蝦皮', 'actual_income': 90.0})
+
+        with self.assertRaises(ValueError):
+            schema.compile(['備註'])
+
+
+if __name__ == '__main__':
+    unittest.main()
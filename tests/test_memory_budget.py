@@ -0,0 +1,136 @@
+import unittest
+import os
+import tracemalloc
+from unittest import mock
+from openpyxl import Workbook
+
+from src.handlers import ExcelHandler, LedgerExporter
+from src.handlers import excel_handler
+from src.utils import MemoryBudget, MemoryBudgetExceeded
+
+
+MB = 1024 * 1024
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """MemoryBudget 與分塊處理的單元測試"""
+
+    ROWS = 5000
+
+    @classmethod
+    def setUpClass(cls):
+        """建立大型測試帳本"""
+        cls.test_file = "test_memory_budget.xlsx"
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '平台費用', '實收金額',
+            '需要發票', '應稅'
+        ])
+        for i in range(cls.ROWS):
+            ws.append(["2025", "08", "19", "14:30:00", "蝦皮", f"商品{i}",
+                       1, 100.0, 10.0, 90.0, False, True])
+        wb.save(cls.test_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        """清理測試環境"""
+        if os.path.exists(cls.test_file):
+            os.remove(cls.test_file)
+
+    def setUp(self):
+        """設定測試環境"""
+        self.output_file = "test_memory_budget.csv"
+        self.budget = MemoryBudget(limit_bytes=16 * MB, large_file_bytes=1024,
+                                   chunk_size=500)
+
+    def tearDown(self):
+        """清理測試環境"""
+        if os.path.exists(self.output_file):
+            os.remove(self.output_file)
+
+    def test_chunked_listing_under_budget(self):
+        """測試分塊讀取的記憶體峰值低於預算"""
+        handler = ExcelHandler(self.test_file, memory_budget=self.budget)
+        total = 0
+        for chunk in handler.iter_entries():
+            self.assertLessEqual(len(chunk), 500)
+            total += len(chunk)
+        self.assertEqual(total, self.ROWS)
+        self.assertIn('list', self.budget.peaks)
+        self.assertLess(self.budget.peaks['list'], self.budget.limit_bytes)
+
+    def test_validate_under_budget(self):
+        """測試逐列驗證的記憶體峰值低於預算"""
+        handler = ExcelHandler(self.test_file, memory_budget=self.budget)
+        stats = handler.validate_file()
+        self.assertEqual(stats, {'rows': self.ROWS, 'valid': self.ROWS, 'invalid': 0})
+        self.assertLess(self.budget.peaks['validate'], self.budget.limit_bytes)
+
+    def test_export_under_budget(self):
+        """測試串流匯出的記憶體峰值低於預算"""
+        exporter = LedgerExporter(self.test_file, memory_budget=self.budget)
+        stats = exporter.export(self.output_file, 'csv')
+        self.assertEqual(stats['exported'], self.ROWS)
+        self.assertLess(self.budget.peaks['export'], self.budget.limit_bytes)
+
+    def test_guard_fails_fast(self):
+        """測試超過預算時立即中止"""
+        budget = MemoryBudget(limit_bytes=MB, check_interval=100)
+        with self.assertRaises(MemoryBudgetExceeded):
+            with budget.guard('materialize') as guard:
+                data = []
+                for i in guard.track(range(1000000)):
+                    data.append(str(i))
+        self.assertGreater(budget.peaks['materialize'], MB)
+
+    def test_guard_without_reset_peak(self):
+        """測試沒有 tracemalloc.reset_peak()（Python 3.9 以前）時仍可監控"""
+        reset_peak = getattr(tracemalloc, 'reset_peak', None)
+        if reset_peak is not None:
+            del tracemalloc.reset_peak
+        tracemalloc.start()
+        try:
+            budget = MemoryBudget(limit_bytes=MB, check_interval=100)
+            with self.assertRaises(MemoryBudgetExceeded):
+                with budget.guard('materialize') as guard:
+                    data = [str(i) for i in guard.track(range(1000000))]
+        finally:
+            tracemalloc.stop()
+            if reset_peak is not None:
+                tracemalloc.reset_peak = reset_peak
+
+    def test_loaded_handler_reads_memory(self):
+        """測試已載入的大檔案直接讀取記憶體中的工作表，不重新解析檔案也不監控記憶體"""
+        handler = ExcelHandler(self.test_file, memory_budget=self.budget)
+        self.assertTrue(handler.load_workbook())
+        self.assertNotIn('load', self.budget.peaks)
+
+        with mock.patch.object(excel_handler, 'iter_ledger_entries') as streamed:
+            total = sum(len(chunk) for chunk in handler.iter_entries())
+        self.assertEqual(total, self.ROWS)
+        streamed.assert_not_called()
+        self.assertNotIn('list', self.budget.peaks)
+
+    def test_read_only_when_over_budget(self):
+        """測試預估載入記憶體超過預算時改以唯讀模式開啟"""
+        budget = MemoryBudget(limit_bytes=4 * MB, large_file_bytes=1024)
+        handler = ExcelHandler(self.test_file, memory_budget=budget)
+        self.assertTrue(handler.load_workbook())
+        self.assertTrue(handler.read_only)
+        self.assertIsNone(handler.workbook)
+
+        total = sum(len(chunk) for chunk in handler.iter_entries())
+        self.assertEqual(total, self.ROWS)
+        self.assertEqual(sum(1 for _ in handler.iter_indexed_entries()), self.ROWS)
+
+        entry = next(handler.iter_indexed_entries())[1]
+        self.assertFalse(handler.add_entry(entry))
+        self.assertFalse(handler.delete_entry(2))
+        self.assertFalse(handler.is_dirty)
+
+
+if __name__ == '__main__':
+    unittest.main()
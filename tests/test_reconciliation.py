@@ -0,0 +1,127 @@
+import unittest
+import os
+from openpyxl import Workbook
+
+from src.models import AccountingEntry
+from src.services import Reconciler
+
+
+class TestReconciler(unittest.TestCase):
+    """Reconciler 類別的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.ledger_file = "test_reconcile_ledger.xlsx"
+        self.statement_file = "test_reconcile_statement.csv"
+
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '平台費用', '實收金額',
+            '需要發票', '應稅'
+        ])
+        ws.append(["2025", "08", "01", "10:00:00", "蝦皮", "商品A", 1, 100.0, 10.0, 90.0, False, True])
+        ws.append(["2025", "08", "02", "11:00:00", "蝦皮", "商品B", 1, 200.0, 20.0, 180.0, False, True])
+        ws.append(["2025", "08", "03", "12:00:00", "蝦皮", "商品C", 1, 300.0, 30.0, 270.0, False, True])
+        ws.append(["2025", "08", "04", "13:00:00", "蝦皮", "商品D", 1, 400.0, 40.0, 360.0, False, True])
+        wb.save(self.ledger_file)
+
+        with open(self.statement_file, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write("訂單時間,商品名稱,銷售總額,平台費用,實收金額\n")
+            f.write("2025/08/01 10:00:00,商品A,100,10,90\n")
+            f.write("2025-08-02 11:00:00,商品B,200,25,175\n")
+            f.write("2025-08-04 13:00:00,商品D,\"400.00\",40,360\n")
+            f.write("2025-08-05 09:00:00,商品E,500,50,450\n")
+
+    def tearDown(self):
+        """清理測試環境"""
+        for path in (self.ledger_file, self.statement_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_reconcile_files(self):
+        """測試帳本與對帳單比對"""
+        result = Reconciler().reconcile_files(self.ledger_file, self.statement_file)
+        self.assertEqual(result.summary(), {
+            'matched': 2,
+            'ledger_only': 1,
+            'statement_only': 1,
+            'mismatches': 1,
+            'invalid_rows': 0
+        })
+        self.assertEqual(result.matched, [(2, 2), (5, 4)])
+        self.assertEqual(result.ledger_only[0][0], 4)
+        self.assertEqual(result.ledger_only[0][1].product_name, "商品C")
+        self.assertEqual(result.statement_only[0].product_name, "商品E")
+
+        mismatch = result.mismatches[0]
+        self.assertEqual(mismatch.row_index, 3)
+        self.assertEqual([d.field for d in mismatch.differences],
+                         ['platform_fee', 'actual_income'])
+        self.assertEqual(mismatch.differences[0].difference, 5.0)
+
+    def test_custom_key_and_columns(self):
+        """測試自訂對帳鍵與欄位名稱"""
+        entry = AccountingEntry(
+            year="2025", month="8", day="1", time="10:00:00",
+            platform="露天", product_name="商品A", order_quantity=1,
+            total_sales=100.0, platform_fee=10.0
+        )
+        with open(self.statement_file, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write("time,item,fee\n")
+            f.write("2025-08-01 10:00,商品A,12\n")
+
+        reconciler = Reconciler(
+            key_fields=('order_time', 'product_name'),
+            columns={'order_time': 'time', 'product_name': 'item', 'platform_fee': 'fee'}
+        )
+        # 對帳單沒有秒數，應正規化後仍能配對
+        result = reconciler.reconcile(
+            [(2, entry)], reconciler.read_statement(self.statement_file)
+        )
+        self.assertEqual(result.summary()['mismatches'], 1)
+        self.assertEqual(result.mismatches[0].differences[0].field, 'platform_fee')
+
+    def test_total_sales_mismatch(self):
+        """測試銷售總額不同時列為金額不一致，而不是分成兩邊各一筆"""
+        with open(self.statement_file, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write("訂單時間,商品名稱,銷售總額,平台費用,實收金額\n")
+            f.write("2025-08-01 10:00:00,商品A,100,10,90\n")
+            f.write("2025-08-03 12:00:00,商品C,320,30,290\n")
+
+        result = Reconciler().reconcile_files(self.ledger_file, self.statement_file)
+        self.assertEqual(result.matched, [(2, 2)])
+        self.assertEqual(result.statement_only, [])
+        self.assertEqual([row for row, _ in result.ledger_only], [3, 5])
+
+        mismatch = result.mismatches[0]
+        self.assertEqual((mismatch.row_index, mismatch.statement.line_number), (4, 3))
+        self.assertEqual([d.field for d in mismatch.differences],
+                         ['total_sales', 'actual_income'])
+        self.assertEqual(mismatch.differences[0].difference, 20.0)
+
+    def test_invalid_amounts(self):
+        """測試無法解析的金額不會中止對帳，並記錄所在行號"""
+        with open(self.statement_file, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write("訂單時間,商品名稱,銷售總額,平台費用,實收金額\n")
+            f.write("2025-08-01 10:00:00,商品A,NT$100,10,90\n")
+            f.write("2025-08-02 11:00:00,商品B,200,-,N/A\n")
+
+        result = Reconciler().reconcile_files(self.ledger_file, self.statement_file)
+        self.assertEqual(result.matched, [(2, 2), (3, 3)])
+        self.assertEqual(len(result.invalid_rows), 1)
+        invalid = result.invalid_rows[0]
+        self.assertEqual(invalid.line_number, 3)
+        self.assertEqual(invalid.invalid_amounts,
+                         {'platform_fee': '-', 'actual_income': 'N/A'})
+
+    def test_invalid_key_field(self):
+        """測試不支援的對帳鍵欄位"""
+        with self.assertRaises(ValueError):
+            Reconciler(key_fields=('platform',))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import os
+from openpyxl import Workbook, load_workbook
+
+from src.models import AccountingEntry
+from src.handlers import ExcelHandler
+from src.services import TaxLedger, period_of
+
+
+def _entry(month, sales, fee, invoice_required=False, taxable=True):
+    return AccountingEntry(
+        year="2025", month=month, day="01", time="10:00:00",
+        platform="蝦皮", product_name="測試商品", order_quantity=1,
+        total_sales=sales, platform_fee=fee,
+        invoice_required=invoice_required, taxable=taxable
+    )
+
+
+class TestTaxLedger(unittest.TestCase):
+    """TaxLedger 類別的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.test_file = "test_tax_ledger.xlsx"
+        self.output_file = "test_tax_filing.xlsx"
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            '年份', '月份', '日期', '時間',
+            '平台', '商品名稱', '訂單數量',
+            '銷售總額', '平台費用', '實收金額',
+            '需要發票', '應稅'
+        ])
+        wb.save(self.test_file)
+
+    def tearDown(self):
+        """清理測試環境"""
+        for path in (self.test_file, self.output_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_period_of(self):
+        """測試月份對應的申報期別"""
+        self.assertEqual([period_of(m) for m in ("01", "02", "03", "11", "12")], [1, 1, 2, 6, 6])
+        self.assertEqual([period_of(m) for m in ("Aug", "0", "13", "")], [None] * 4)
+
+    def test_build(self):
+        """測試依期別累計金額"""
+        ledger = TaxLedger().build([
+            _entry("01", 1050.0, 50.0, invoice_required=True),
+            _entry("02", 210.0, 10.0),
+            _entry("02", 300.0, 30.0, taxable=False),
+            _entry("03", 100.0, 10.0)
+        ])
+        totals = ledger.period("2025", 1)
+        self.assertEqual(totals.entries, 3)
+        self.assertEqual(totals.taxable_sales, 1260.0)
+        self.assertEqual(totals.taxable_fees, 60.0)
+        self.assertEqual(totals.exempt_sales, 300.0)
+        self.assertEqual(totals.invoice_sales, 1050.0)
+        self.assertEqual(totals.invoice_fees, 50.0)
+        self.assertEqual(totals.taxable_net_sales, 1200)
+        self.assertEqual(totals.output_tax, 60.0)
+        self.assertEqual([t.label for t in ledger.periods()],
+                         ["2025 年 01-02 月", "2025 年 03-04 月"])
+        self.assertTrue(ledger.period("2025", 6).is_empty)
+
+    def test_follows_handler_changes(self):
+        """測試帳本變更時即時更新累計金額"""
+        handler = ExcelHandler(self.test_file)
+        handler.load_workbook()
+        handler.add_entry(_entry("01", 100.0, 10.0))
+        ledger = TaxLedger().attach(handler)
+        self.assertEqual(ledger.period("2025", 1).taxable_sales, 100.0)
+
+        handler.add_entry(_entry("02", 200.0, 20.0, invoice_required=True))
+        self.assertEqual(ledger.period("2025", 1).taxable_sales, 300.0)
+        self.assertEqual(ledger.period("2025", 1).invoice_sales, 200.0)
+
+        # 修改月份後移到下一期
+        handler.update_entry(2, _entry("03", 100.0, 10.0, taxable=False))
+        self.assertEqual(ledger.period("2025", 1).taxable_sales, 200.0)
+        self.assertEqual(ledger.period("2025", 2).exempt_sales, 100.0)
+
+        handler.delete_entry(3)
+        self.assertTrue(ledger.period("2025", 1).is_empty)
+        self.assertEqual(len(ledger.periods()), 1)
+
+        # 重新載入時依檔案內容重建
+        handler.load_workbook()
+        self.assertEqual(ledger.periods(), [])
+
+        ledger.detach()
+        handler.add_entry(_entry("01", 100.0, 10.0))
+        self.assertEqual(ledger.periods(), [])
+
+    def test_invalid_month(self):
+        """測試月份無效的項目不會中斷建立累計，只計入略過筆數"""
+        handler = ExcelHandler(self.test_file)
+        handler.load_workbook()
+        handler.add_entry(_entry("Aug", 100.0, 10.0))
+        handler.add_entry(_entry("01", 200.0, 20.0))
+        ledger = TaxLedger().attach(handler)
+        self.assertEqual(ledger.skipped, 1)
+        self.assertEqual(ledger.period("2025", 1).taxable_sales, 200.0)
+
+        # 改為有效月份後歸入期別；之後的接收者仍會收到通知
+        events = []
+        handler.add_listener(lambda kind, *args: events.append(kind))
+        self.assertTrue(handler.update_entry(2, _entry("02", 100.0, 10.0)))
+        self.assertEqual(ledger.skipped, 0)
+        self.assertEqual(ledger.period("2025", 1).taxable_sales, 300.0)
+        self.assertEqual(events, ['update'])
+
+    def test_export_filing_workbook(self):
+        """測試輸出申報工作表"""
+        ledger = TaxLedger().build([_entry("05", 525.0, 25.0, invoice_required=True)])
+        self.assertTrue(ledger.export_filing_workbook(self.output_file))
+
+        wb = load_workbook(self.output_file)
+        self.assertEqual(wb.sheetnames, ["2025-05-06"])
+        rows = list(wb.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('申報期間', '2025 年 05-06 月', None, None))
+        self.assertEqual(rows[3], ('應稅銷售', 1, 525.0, 25.0))
+        self.assertEqual(rows[9][1], 25)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import os
+from openpyxl import Workbook
+
+from src.handlers import ExcelHandler
+from src.services import diff_workbooks, merge_diff
+
+
+HEADERS = [
+    '年份', '月份', '日期', '時間',
+    '平台', '商品名稱', '訂單數量',
+    '銷售總額', '平台費用', '實收金額',
+    '需要發票', '應稅'
+]
+
+
+def _row(day, product, sales, fee=10.0):
+    return ["2025", "08", day, "10:00:00", "蝦皮", product, 1, sales, fee, sales - fee, False, True]
+
+
+def _save(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADERS)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+class TestWorkbookDiff(unittest.TestCase):
+    """帳本比對與合併的單元測試"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.base_file = "test_diff_base.xlsx"
+        self.other_file = "test_diff_other.xlsx"
+        self.master_file = "test_diff_master.xlsx"
+        self.base_rows = [
+            _row("01", "商品A", 100.0),
+            _row("02", "商品B", 200.0),
+            _row("03", "商品C", 300.0),
+            _row("04", "商品D", 400.0)
+        ]
+        _save(self.base_file, self.base_rows)
+        # 修改版本：刪除 B、修改 C 的手續費、新增 E，並調整順序
+        _save(self.other_file, [
+            _row("04", "商品D", 400.0),
+            _row("01", "商品A", 100.0),
+            _row("03", "商品C", 300.0, fee=35.0),
+            _row("05", "商品E", 500.0)
+        ])
+
+    def tearDown(self):
+        """清理測試環境"""
+        for path in (self.base_file, self.other_file, self.master_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_diff_workbooks(self):
+        """測試比對兩個帳本版本"""
+        diff = diff_workbooks(self.base_file, self.other_file)
+        self.assertEqual(diff.summary(), {
+            'inserted': 1, 'deleted': 1, 'modified': 1, 'unchanged': 2
+        })
+        self.assertEqual(diff.deleted[0].before.product_name, "商品B")
+        self.assertEqual(diff.inserted[0].after.product_name, "商品E")
+
+        modified = diff.modified[0]
+        self.assertEqual((modified.base_row, modified.other_row), (4, 4))
+        self.assertEqual([c.field for c in modified.changes], ['platform_fee', 'actual_income'])
+        self.assertEqual((modified.changes[0].old, modified.changes[0].new), (10.0, 35.0))
+
+    def test_diff_by_content(self):
+        """測試只依內容比對"""
+        diff = diff_workbooks(self.base_file, self.other_file, key_fields=None)
+        self.assertEqual(diff.summary(), {
+            'inserted': 2, 'deleted': 2, 'modified': 0, 'unchanged': 2
+        })
+        self.assertTrue(diff_workbooks(self.base_file, self.base_file).is_empty)
+
+    def test_three_way_merge(self):
+        """測試將差異合併回主帳本"""
+        # 主帳本在原始版本後另外新增 F，並修改了 D
+        _save(self.master_file, self.base_rows[:3] + [
+            _row("04", "商品D", 450.0),
+            _row("06", "商品F", 600.0)
+        ])
+        handler = ExcelHandler(self.master_file)
+        handler.load_workbook()
+        result = merge_diff(handler, diff_workbooks(self.base_file, self.other_file))
+
+        # C 修改、B 刪除、E 新增
+        self.assertEqual(result.applied, 3)
+        self.assertEqual(result.skipped, 0)
+        self.assertEqual(result.conflicts, [])
+
+        products = {e.product_name: e for e in handler.read_entries()}
+        self.assertEqual(sorted(products), ["商品A", "商品C", "商品D", "商品E", "商品F"])
+        self.assertEqual(products["商品C"].platform_fee, 35.0)
+        self.assertEqual(products["商品D"].total_sales, 450.0)
+
+        # 再次合併時所有變更都已存在
+        result = merge_diff(handler, diff_workbooks(self.base_file, self.other_file))
+        self.assertEqual(result.applied, 0)
+        self.assertEqual(result.skipped, 3)
+        self.assertEqual(result.conflicts, [])
+
+    def test_merge_conflict(self):
+        """測試主帳本已修改同一筆項目時產生衝突"""
+        _save(self.master_file, [
+            _row("01", "商品A", 100.0),
+            _row("02", "商品B", 250.0),
+            _row("03", "商品C", 320.0),
+            _row("04", "商品D", 400.0)
+        ])
+        handler = ExcelHandler(self.master_file)
+        handler.load_workbook()
+        result = merge_diff(handler, diff_workbooks(self.base_file, self.other_file))
+
+        self.assertEqual(len(result.conflicts), 2)
+        self.assertEqual(result.applied, 1)
+        products = {e.product_name: e for e in handler.read_entries()}
+        self.assertEqual(products["商品B"].total_sales, 250.0)
+        self.assertEqual(products["商品C"].total_sales, 320.0)
+
+
+if __name__ == '__main__':
+    unittest.main()